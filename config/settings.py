@@ -13,6 +13,8 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from .database import parse_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,15 +48,21 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'lubimovka.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'lubimovka.middleware.WebSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'lubimovka.middleware.WebCsrfViewMiddleware',
+    'lubimovka.middleware.WebAuthenticationMiddleware',
+    'lubimovka.middleware.WebMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Запросы с этим префиксом без cookie сессии не проходят через сессии,
+# CSRF, аутентификацию Django и сообщения: клиент аутентифицируется по
+# токену.
+API_PATH_PREFIX = '/api/'
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -79,12 +87,88 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# INCLUDE в индексах работает в PostgreSQL; SQLite столбцы без ключа
+# пропускает, а первичный ключ и так хранит в каждом индексе.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+# Сколько секунд соединение с БД переиспользуется между запросами.
+# 0 закрывает соединение после каждого запроса.
+DATABASE_CONN_MAX_AGE = int(os.getenv('DATABASE_CONN_MAX_AGE', 60))
+# Перед первым запросом переиспользованное соединение проверяется и при
+# обрыве открывается заново, а не отдаёт клиенту ошибку.
+DATABASE_HEALTH_CHECKS = os.getenv('DATABASE_HEALTH_CHECKS', '1') in (
+    '1', 'true', 'yes'
+)
+# БД за пулером соединений в режиме транзакций (PgBouncer): серверные
+# курсоры не переживают переключение соединения между транзакциями.
+DATABASE_TRANSACTION_POOLING = os.getenv(
+    'DATABASE_TRANSACTION_POOLING', ''
+) in ('1', 'true', 'yes')
+
 DATABASES = {
+    'default': parse_database_url(
+        os.getenv('DATABASE_URL', f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+        CONN_MAX_AGE=DATABASE_CONN_MAX_AGE,
+        CONN_HEALTH_CHECKS=DATABASE_HEALTH_CHECKS,
+        DISABLE_SERVER_SIDE_CURSORS=DATABASE_TRANSACTION_POOLING,
+    )
+}
+
+# Реплики для чтения, через запятую: DATABASE_REPLICA_URLS=url1,url2.
+# Каждая становится псевдонимом replica_N; в тестах — зеркалом default.
+DATABASE_REPLICAS = []
+for number, url in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), 1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = parse_database_url(
+        url.strip(),
+        CONN_MAX_AGE=DATABASE_CONN_MAX_AGE,
+        CONN_HEALTH_CHECKS=DATABASE_HEALTH_CHECKS,
+        DISABLE_SERVER_SIDE_CURSORS=DATABASE_TRANSACTION_POOLING,
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['lubimovka.routers.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной БД, а не
+# из реплик. Должно превышать обычное отставание репликации. Отметка
+# хранится в кэше, поэтому с репликами нужен общий кэш (CACHE_BACKEND).
+REPLICA_PIN_TIMEOUT = int(os.getenv('REPLICA_PIN_TIMEOUT', 10))
+
+# PRAGMA для каждого нового соединения с SQLite. WAL позволяет читать
+# параллельно с записью, busy_timeout (мс) ждёт снятия блокировки
+# записи вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+}
+
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
+# Кэш в памяти у каждого процесса свой: сброс в одном процессе другие не
+# увидят. Кэши, которые должны быть согласованы между процессами,
+# по умолчанию включены только с общим бэкендом (Redis, Memcached, БД).
+CACHE_IS_SHARED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Время жизни закэшированных ответов API, секунды. 0 отключает кэш.
+# Без общего кэша выключен: изменение данных сбросило бы ответы только
+# в том процессе, который его выполнил.
+API_CACHE_TIMEOUT = int(
+    os.getenv('API_CACHE_TIMEOUT', 300 if CACHE_IS_SHARED else 0)
+)
 
 
 # Password validation
@@ -131,10 +215,25 @@ STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'lubimovka.authentication.StatelessJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 
+    'DEFAULT_RENDERER_CLASSES': [
+        'lubimovka.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'lubimovka.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'],
 
@@ -153,10 +252,70 @@ EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = os.getenv("EMAIL_PORT")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+
+# Процессов для хэширования паролей при массовом создании
+# пользователей командой provision_users; по умолчанию число ядер.
+PASSWORD_HASHING_WORKERS = (
+    int(os.getenv('PASSWORD_HASHING_WORKERS', 0)) or None
+)
+
+# Фоновые задачи (manage.py run_tasks): размер пула обработчика, число
+# попыток, пауза перед первым повтором (далее удваивается) и время, через
+# которое задачу упавшего обработчика забирает другой, секунды.
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", 4))
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 30
+TASK_LEASE = 600
+# Сколько секунд хранить выполненные задачи.
+TASK_KEEP_DONE = 7 * 24 * 60 * 60
 
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_URLS_REGEX = r'^/api/.*$'
 
+# Время жизни общего кэша ролей пользователей в организациях, секунды.
+# 0 отключает кэш, роли проверяются запросом к БД один раз за запрос.
+# Без общего кэша выключен: отзыв доступа не дошёл бы до других
+# процессов.
+ORGANIZATION_ROLE_CACHE_TIMEOUT = int(
+    os.getenv("ORGANIZATION_ROLE_CACHE_TIMEOUT", 30 if CACHE_IS_SHARED else 0)
+)
+
+# Профилирование запросов к API: число и время запросов к БД, повторы,
+# время сериализации и размер ответа. Выключено, middleware при этом
+# не подключается.
+QUERY_PROFILING = os.getenv('QUERY_PROFILING', '') in ('1', 'true', 'yes')
+# Сколько последних запросов к каждому маршруту хранить для статистики.
+QUERY_PROFILING_WINDOW = int(os.getenv('QUERY_PROFILING_WINDOW', 500))
+# Сколько раз должен повториться запрос, чтобы считаться дублем (N+1).
+QUERY_PROFILING_DUPLICATE_THRESHOLD = 3
+
+# Потоки для запросов к БД из асинхронных представлений /api/v1/async/.
+# Ограничивает число одновременных соединений с БД под ASGI.
+ASYNC_READ_WORKERS = int(os.getenv('ASYNC_READ_WORKERS', 8))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'lubimovka.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Сколько секунд закэшированная версия токенов пользователя считается
+# верной. Без общего кэша выключен: отзыв в одном процессе не дошёл бы
+# до других, и версия читается из БД на каждый запрос.
+TOKEN_VERSION_CACHE_TIMEOUT = int(
+    os.getenv("TOKEN_VERSION_CACHE_TIMEOUT", 60 if CACHE_IS_SHARED else 0)
+)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
 }
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Employee, Organization
+from .models import Employee, Organization, Task
+from .tasks import enqueue, normalize_phone_numbers, reindex_search
 
 
 class OrganizationEmployeeRelationAdminInline(admin.TabularInline):
@@ -17,6 +18,20 @@ class OrganizationUserRelationAdminInline(admin.TabularInline):
 
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ("name", "surname", "patronymic", "position")
+    actions = ("normalize_phone_numbers", "reindex_search")
+
+    @admin.action(description="Нормализовать номера телефонов (в фоне)")
+    def normalize_phone_numbers(self, request, queryset):
+        enqueue(
+            normalize_phone_numbers,
+            employee_ids=list(queryset.values_list("pk", flat=True)),
+        )
+        self.message_user(request, "Задача поставлена в очередь.")
+
+    @admin.action(description="Перестроить поисковый индекс (в фоне)")
+    def reindex_search(self, request, queryset):
+        enqueue(reindex_search)
+        self.message_user(request, "Задача поставлена в очередь.")
 
 
 class OrganizationAdmin(admin.ModelAdmin):
@@ -27,5 +42,12 @@ class OrganizationAdmin(admin.ModelAdmin):
     list_display = ("title", "address")
 
 
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_after", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = [field.name for field in Task._meta.fields]
+
+
 admin.site.register(Employee, EmployeeAdmin)
 admin.site.register(Organization, OrganizationAdmin)
+admin.site.register(Task, TaskAdmin)
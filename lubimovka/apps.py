@@ -1,7 +1,60 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save, pre_delete, pre_save)
 
 
 class LubimConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "lubimovka"
     verbose_name = "Любимовка"
+
+    def ready(self):
+        from . import db, routers, signals
+        from .models import (Employee, Organization,
+                             OrganizationEmployeeRelation,
+                             OrganizationUserRelation, User)
+
+        checks.register(routers.check_replica_cache, checks.Tags.database)
+        connection_created.connect(db.configure_sqlite)
+        request_started.connect(db.check_connections_health)
+        post_migrate.connect(
+            signals.ensure_search_index_after_migrate, sender=self
+        )
+        pre_save.connect(signals.on_user_pre_save, sender=User)
+        for model, relation_model, field_name in (
+            (Employee, OrganizationEmployeeRelation, "employee"),
+            (User, OrganizationUserRelation, "user"),
+        ):
+            pre_delete.connect(
+                signals.remember_organizations(relation_model, field_name),
+                sender=model,
+                weak=False,
+            )
+            post_delete.connect(
+                signals.refresh_remembered_counters, sender=model
+            )
+        for signal in (post_save, post_delete):
+            signal.connect(signals.on_user_change, sender=User)
+            signal.connect(signals.on_employee_change, sender=Employee)
+            signal.connect(
+                signals.on_organization_change, sender=Organization
+            )
+            signal.connect(
+                signals.on_employee_relation_change,
+                sender=OrganizationEmployeeRelation,
+            )
+            signal.connect(
+                signals.on_user_relation_change,
+                sender=OrganizationUserRelation,
+            )
+        m2m_changed.connect(
+            signals.on_employees_m2m_change,
+            sender=Organization.employees.through,
+        )
+        m2m_changed.connect(
+            signals.on_access_m2m_change,
+            sender=Organization.access_to_edit.through,
+        )
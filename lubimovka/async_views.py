@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .db import check_connections_health
+from .views import AccessToEditView, EmployeeViewSet, OrganizationViewSet
+
+DEFAULT_WORKERS = 8
+READ_METHODS = ["get", "head", "options"]
+
+_executor = None
+
+
+def get_executor():
+    """Пул потоков для работы с БД из асинхронных представлений.
+
+    Размер пула ограничивает число одновременных соединений с БД, а не
+    число открытых клиентских соединений: медленный клиент занимает
+    только цикл событий, поток освобождается сразу после ответа БД.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(
+                settings, "ASYNC_READ_WORKERS", DEFAULT_WORKERS
+            ),
+            thread_name_prefix="lubimovka-read",
+        )
+    return _executor
+
+
+def _handle(view, request, *args, **kwargs):
+    # Поток пула живёт дольше запроса, поэтому соединения с БД в нём
+    # закрываются и помечаются для проверки так же, как обработчик
+    # делает это по сигналам request_started и request_finished.
+    close_old_connections()
+    check_connections_health()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Асинхронная обёртка над синхронным представлением только для
+    чтения.
+
+    Django 3.2 не умеет асинхронно обращаться к ORM, поэтому
+    аутентификация, проверка прав, запросы к БД и рендеринг выполняются
+    одним блоком в пуле ``get_executor()``, а ожидание клиента остаётся
+    в цикле событий. Ответ совпадает с ответом синхронного пути.
+
+    ``QueryProfilingMiddleware`` считает запросы через обёртки
+    соединений своего потока; соединения потоков пула у каждого потока
+    свои, поэтому запросы этих представлений в профиль не попадают,
+    учитывается только время сериализации.
+    """
+
+    async def wrapper(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            get_executor(),
+            partial(context.run, _handle, view, request, *args, **kwargs),
+        )
+
+    # csrf_exempt в Django 3.2 превращает корутину в обычную функцию.
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+organization_list = async_read_view(
+    OrganizationViewSet.as_view({"get": "list"})
+)
+organization_detail = async_read_view(
+    OrganizationViewSet.as_view({"get": "retrieve"})
+)
+employee_list = async_read_view(EmployeeViewSet.as_view({"get": "list"}))
+employee_detail = async_read_view(EmployeeViewSet.as_view({"get": "retrieve"}))
+access_to_edit_list = async_read_view(
+    AccessToEditView.as_view(http_method_names=READ_METHODS)
+)
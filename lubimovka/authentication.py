@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+EMAIL_CLAIM = "email"
+IS_STAFF_CLAIM = "is_staff"
+TOKEN_VERSION_CLAIM = "ver"
+
+# Поля пользователя, изменение которых отзывает выданные токены: они
+# либо попадают в токен, либо запрещают вход.
+TOKEN_FIELDS = ("email", "is_staff", "is_active")
+
+TOKEN_VERSION_CACHE_KEY = "token-version:{user_id}"
+# Версия неактивного или удалённого пользователя: не совпадёт ни с одной
+# выданной.
+REVOKED = -1
+
+
+def _token_version_cache_timeout():
+    return getattr(settings, "TOKEN_VERSION_CACHE_TIMEOUT", 0)
+
+
+def add_claims(token, user):
+    token[EMAIL_CLAIM] = user.email
+    token[IS_STAFF_CLAIM] = user.is_staff
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def cache_token_version(user_id, version):
+    timeout = _token_version_cache_timeout()
+    if timeout:
+        cache.set(
+            TOKEN_VERSION_CACHE_KEY.format(user_id=user_id), version, timeout
+        )
+
+
+def forget_token_version(user_id):
+    """Сбрасывает закэшированную версию после коммита: до него
+    параллельный запрос прочитал бы из БД и закэшировал старую."""
+    key = TOKEN_VERSION_CACHE_KEY.format(user_id=user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя, из кэша или из БД.
+
+    Время жизни записи в кэше ограничивает, насколько долго другой
+    процесс с собственным кэшем может принимать отозванный токен.
+    """
+    key = TOKEN_VERSION_CACHE_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id, is_active=True)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if version is None:
+            version = REVOKED
+        cache_token_version(user_id, version)
+    return version
+
+
+def revoke_tokens(user_id):
+    """Отзывает все выданные пользователю токены."""
+    User.objects.filter(pk=user_id).update(
+        token_version=F("token_version") + 1
+    )
+    forget_token_version(user_id)
+
+
+def check_token_version(token):
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    version = token.get(TOKEN_VERSION_CLAIM)
+    if user_id is None or version is None:
+        raise AuthenticationFailed(
+            "Токен не содержит нужных данных.", code="token_not_valid"
+        )
+    if version != get_token_version(user_id):
+        raise AuthenticationFailed("Токен отозван.", code="token_not_valid")
+    return user_id
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Аутентификация по JWT без чтения пользователя из БД.
+
+    Пользователь собирается из утверждений токена: id, email, is_staff и
+    версии токенов. Версия сверяется с общим кэшем, поэтому отзыв
+    токенов через ``revoke_tokens`` срабатывает без запроса к БД на
+    каждом обращении; без общего кэша версия читается из БД одним
+    запросом по первичному ключу. Остальные поля пользователя отложены
+    и загрузятся из БД при первом обращении к ним.
+    """
+
+    def get_user(self, validated_token):
+        user_id = check_token_version(validated_token)
+        return User.from_db(
+            router.db_for_read(User),
+            ["id", "email", "is_staff", "is_active", "token_version"],
+            [
+                user_id,
+                validated_token.get(EMAIL_CLAIM),
+                validated_token.get(IS_STAFF_CLAIM, False),
+                True,
+                validated_token[TOKEN_VERSION_CLAIM],
+            ],
+        )
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        check_token_version(RefreshToken(attrs["refresh"]))
+        return super().validate(attrs)
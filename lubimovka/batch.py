@@ -0,0 +1,112 @@
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+IDS_PARAM = "ids"
+BATCH_MAX_SIZE = 1000
+
+
+def parse_ids(values, max_size=BATCH_MAX_SIZE):
+    """id из списка чисел или строк вида ``"1,2,3"`` без повторов, в
+    исходном порядке."""
+    ids = []
+    for value in values:
+        parts = value.split(",") if isinstance(value, str) else [value]
+        for part in parts:
+            if isinstance(part, str):
+                part = part.strip()
+                if not part:
+                    continue
+            if isinstance(part, bool):
+                part = None
+            try:
+                ids.append(int(part))
+            except (TypeError, ValueError):
+                raise ValidationError({IDS_PARAM: "Укажите целые числа."})
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({IDS_PARAM: "Укажите хотя бы один id."})
+    if len(ids) > max_size:
+        raise ValidationError({IDS_PARAM: f"Не более {max_size} id."})
+    return ids
+
+
+def _pk(item):
+    return item["id"] if isinstance(item, dict) else item.pk
+
+
+class BatchRetrieveMixin:
+    """Получение нескольких объектов по списку id за один запрос.
+
+    ``GET batch/?ids=1,2,3`` или ``POST batch/`` с телом
+    ``{"ids": [1, 2, 3]}`` для списков, которые не помещаются в URL.
+    Объекты выбираются одним ``id__in`` из ``get_queryset()``, поэтому
+    действуют те же правила видимости, и возвращаются в порядке запроса;
+    id, которых нет или которые не видны пользователю, перечислены в
+    ``missing``.
+    """
+
+    batch_max_size = BATCH_MAX_SIZE
+
+    @swagger_auto_schema(
+        methods=["get"],
+        manual_parameters=[
+            openapi.Parameter(
+                IDS_PARAM,
+                openapi.IN_QUERY,
+                description="id через запятую",
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+        ],
+    )
+    @swagger_auto_schema(
+        methods=["post"],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                IDS_PARAM: openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Items(type=openapi.TYPE_INTEGER),
+                )
+            },
+        ),
+    )
+    @action(
+        detail=False,
+        methods=["get", "post"],
+        permission_classes=[IsAuthenticated],
+    )
+    def batch(self, request):
+        if request.method == "GET":
+            return self.cached_response(
+                self.get_list_cache_scopes(), self.batch_response
+            )
+        return self.batch_response(request)
+
+    def batch_response(self, request):
+        if request.method == "GET":
+            values = request.query_params.getlist(IDS_PARAM)
+        else:
+            values = None
+            if isinstance(request.data, dict):
+                values = request.data.get(IDS_PARAM)
+            if not isinstance(values, list):
+                raise ValidationError({IDS_PARAM: "Ожидается список id."})
+        ids = parse_ids(values, self.batch_max_size)
+        found = {
+            _pk(item): item
+            for item in self.get_queryset().filter(pk__in=ids).order_by()
+        }
+        serializer = self.get_serializer(
+            [found[pk] for pk in ids if pk in found], many=True
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [pk for pk in ids if pk not in found],
+            }
+        )
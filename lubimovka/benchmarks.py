@@ -0,0 +1,550 @@
+import json
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections, reset_queries
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .counters import reconcile_counters
+from .models import (
+    Employee,
+    Organization,
+    OrganizationEmployeeRelation,
+    OrganizationUserRelation,
+    User,
+)
+from .profiling import percentile
+from .renderers import FastJSONRenderer
+from .serializers import EmployeeValuesSerializer
+from .utils import get_tokens_for_user
+
+BENCHMARK_PASSWORD = "benchmark-password"
+SEED_BATCH_SIZE = 1000
+
+
+@dataclass
+class SeedData:
+    owner: User
+    editors: list
+    organization_ids: list
+    employee_ids: list
+
+
+def seed(organizations, employees, editors):
+    """Создаёт синтетические данные: ``organizations`` организаций одного
+    владельца, по ``employees`` сотрудников и ``editors`` редакторов в
+    каждой."""
+    password = make_password(BENCHMARK_PASSWORD)
+    owner = User.objects.create(
+        email="owner@benchmark.local", password=password
+    )
+    editor_users = User.objects.bulk_create(
+        [
+            User(email=f"editor{number}@benchmark.local", password=password)
+            for number in range(editors)
+        ]
+    )
+    editor_ids = list(
+        User.objects.filter(email__startswith="editor").values_list(
+            "id", flat=True
+        )
+    )
+    Organization.objects.bulk_create(
+        [
+            Organization(
+                title=f"Организация {number:06}",
+                address=f"Адрес {number}",
+                description="Синтетические данные для замеров",
+                creator=owner,
+            )
+            for number in range(organizations)
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    organization_ids = list(
+        Organization.objects.order_by("id").values_list("id", flat=True)
+    )
+    next_employee_id = (
+        Employee.objects.order_by("-id").values_list("id", flat=True).first()
+        or 0
+    ) + 1
+    employee_ids = []
+    for organization_id in organization_ids:
+        batch = []
+        for number in range(employees):
+            employee = Employee(
+                id=next_employee_id,
+                name=f"Имя{number}",
+                surname=f"Фамилия{organization_id}",
+                patronymic="Отчество",
+                position=f"Должность{number % 10}",
+                work_phone_number=f"+7495{next_employee_id:07}",
+                personal_phone_number=f"+7912{next_employee_id:07}",
+                fax=f"+7499{next_employee_id:07}" if number % 5 == 0 else "",
+            )
+            employee.fill_computed_fields()
+            batch.append(employee)
+            employee_ids.append(next_employee_id)
+            next_employee_id += 1
+        Employee.objects.bulk_create(batch, batch_size=SEED_BATCH_SIZE)
+        OrganizationEmployeeRelation.objects.bulk_create(
+            [
+                OrganizationEmployeeRelation(
+                    organization_id=organization_id, employee_id=employee.id
+                )
+                for employee in batch
+            ],
+            batch_size=SEED_BATCH_SIZE,
+        )
+        OrganizationUserRelation.objects.bulk_create(
+            [
+                OrganizationUserRelation(
+                    organization_id=organization_id, user_id=user_id
+                )
+                for user_id in editor_ids
+            ],
+            batch_size=SEED_BATCH_SIZE,
+        )
+    reconcile_counters()
+    cache.clear()
+    return SeedData(owner, editor_users, organization_ids, employee_ids)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable
+    data: Optional[Callable] = None
+    format: str = "json"
+    extra: dict = field(default_factory=dict)
+    # Готовит данные перед каждым запросом, вне замера: удаление
+    # каждый раз нужно сделать над новым объектом.
+    setup: Optional[Callable] = None
+
+
+def default_scenarios(data):
+    organization_id = data.organization_ids[len(data.organization_ids) // 2]
+    employee_id = data.employee_ids[len(data.employee_ids) // 2]
+    access_url = f"/api/v1/organizations/{organization_id}/access_to_edit/"
+    editors = [user.email for user in data.editors[:50]]
+    # bulk_create на SQLite не возвращает id.
+    editor_ids = list(
+        User.objects.filter(email__in=editors).values_list("id", flat=True)
+    )
+    counter = iter(range(10**9))
+    created = {}
+
+    def grant_editors():
+        OrganizationUserRelation.objects.bulk_create(
+            [
+                OrganizationUserRelation(
+                    organization_id=organization_id, user_id=user_id
+                )
+                for user_id in editor_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+    def create_employee():
+        employee = Employee.objects.create(
+            name="Имя",
+            surname="Удаляемый",
+            patronymic="Отчество",
+            position="Должность",
+        )
+        employee.organization_set.add(organization_id)
+        created["employee"] = employee.pk
+
+    def create_organization():
+        organization = Organization.objects.create(
+            title=f"Удаляемая {next(counter)}",
+            address="Адрес",
+            description="Описание",
+            creator=data.owner,
+        )
+        organization.employees.add(*data.employee_ids[:10])
+        organization.access_to_edit.add(*editor_ids[:10])
+        created["organization"] = organization.pk
+
+    return [
+        Scenario(
+            "registration",
+            "post",
+            lambda: "/api/v1/auth/users/",
+            lambda: {
+                "email": f"new{next(counter)}@benchmark.local",
+                "password": BENCHMARK_PASSWORD,
+            },
+        ),
+        Scenario(
+            "organizations-list", "get", lambda: "/api/v1/organizations/"
+        ),
+        Scenario(
+            "organizations-list-search",
+            "get",
+            lambda: "/api/v1/organizations/?search=имя1",
+        ),
+        Scenario(
+            "organizations-list-fields",
+            "get",
+            lambda: "/api/v1/organizations/?fields=id,title",
+        ),
+        Scenario(
+            "organizations-batch",
+            "get",
+            lambda: "/api/v1/organizations/batch/?ids="
+            + ",".join(map(str, data.organization_ids[:20])),
+        ),
+        Scenario(
+            "organizations-summary",
+            "get",
+            lambda: "/api/v1/organizations/summary/",
+        ),
+        Scenario(
+            "organizations-retrieve",
+            "get",
+            lambda: f"/api/v1/organizations/{organization_id}/",
+        ),
+        Scenario(
+            "organizations-update",
+            "patch",
+            lambda: f"/api/v1/organizations/{organization_id}/",
+            lambda: {"address": "Новый адрес"},
+        ),
+        Scenario(
+            "organizations-create",
+            "post",
+            lambda: "/api/v1/organizations/",
+            lambda: {
+                "title": f"Новая {next(counter)}",
+                "address": "Адрес",
+                "description": "Описание",
+                "employees": data.employee_ids[:10],
+            },
+        ),
+        Scenario(
+            "organizations-delete",
+            "delete",
+            lambda: f"/api/v1/organizations/{created['organization']}/",
+            setup=create_organization,
+        ),
+        Scenario(
+            "organizations-export",
+            "get",
+            lambda: (
+                "/api/v1/organizations/export/"
+                f"?organization={organization_id}"
+            ),
+        ),
+        Scenario("employees-list", "get", lambda: "/api/v1/employees/"),
+        Scenario(
+            "employees-filter-prefix",
+            "get",
+            lambda: "/api/v1/employees/?surname_prefix=Фамилия1",
+        ),
+        Scenario(
+            "employees-by-organization",
+            "get",
+            lambda: (
+                f"/api/v1/employees/?organization={organization_id}"
+                "&ordering=surname"
+            ),
+        ),
+        Scenario(
+            "employees-filter-phone",
+            "get",
+            lambda: f"/api/v1/employees/?phone=%2B7912{employee_id:07}",
+        ),
+        Scenario(
+            "employees-filter-phone-prefix",
+            "get",
+            lambda: (
+                "/api/v1/employees/"
+                f"?phone_prefix=%2B7%20495%20{employee_id // 100:05}"
+            ),
+        ),
+        Scenario(
+            "employees-ordering",
+            "get",
+            lambda: "/api/v1/employees/?ordering=-position",
+        ),
+        Scenario(
+            "employees-batch",
+            "post",
+            lambda: "/api/v1/employees/batch/",
+            lambda: {"ids": data.employee_ids[:500]},
+        ),
+        Scenario(
+            "employees-retrieve",
+            "get",
+            lambda: f"/api/v1/employees/{employee_id}/",
+        ),
+        Scenario(
+            "employees-create",
+            "post",
+            lambda: "/api/v1/employees/",
+            lambda: {
+                "name": "Имя",
+                "surname": "Новый",
+                "patronymic": "Отчество",
+                "position": "Должность",
+                "personal_phone_number": f"+7913{next(counter):07}",
+            },
+        ),
+        Scenario(
+            "employees-update",
+            "patch",
+            lambda: f"/api/v1/employees/{employee_id}/",
+            lambda: {"position": "Новая должность"},
+        ),
+        Scenario(
+            "employees-delete",
+            "delete",
+            lambda: f"/api/v1/employees/{created['employee']}/",
+            setup=create_employee,
+        ),
+        Scenario(
+            "employees-search",
+            "get",
+            lambda: "/api/v1/employees/search/?search=фамилия1",
+        ),
+        Scenario("access-list", "get", lambda: access_url),
+        Scenario(
+            "access-grant",
+            "post",
+            lambda: access_url,
+            lambda: {"user": editors},
+        ),
+        Scenario(
+            "access-revoke",
+            "delete",
+            lambda: access_url,
+            lambda: {"user": editors},
+            setup=grant_editors,
+        ),
+    ]
+
+
+def run_request(client, scenario):
+    method = getattr(client, scenario.method)
+    kwargs = dict(scenario.extra)
+    if scenario.data is not None:
+        kwargs["data"] = scenario.data()
+        kwargs["format"] = scenario.format
+    response = method(scenario.path(), **kwargs)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def prepare(scenario):
+    if scenario.setup is not None:
+        scenario.setup()
+
+
+def measure(client, scenario, iterations, warmup=2):
+    for _ in range(warmup):
+        prepare(scenario)
+        run_request(client, scenario)
+    timings = []
+    for _ in range(iterations):
+        prepare(scenario)
+        started = time.perf_counter()
+        response = run_request(client, scenario)
+        timings.append((time.perf_counter() - started) * 1000)
+    prepare(scenario)
+    reset_queries()
+    with CaptureQueriesContext(connection) as captured:
+        run_request(client, scenario)
+    queries = len(captured)
+    prepare(scenario)
+    tracemalloc.start()
+    try:
+        run_request(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "status": response.status_code,
+        "queries": queries,
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run_benchmark(data, iterations, scenarios=None):
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(data.owner)
+    results = {}
+    for scenario in scenarios or default_scenarios(data):
+        results[scenario.name] = measure(client, scenario, iterations)
+    return results
+
+
+def measure_encoding(rows, iterations):
+    """Время кодирования списка сотрудников стандартным рендерером DRF и
+    рендерером на orjson."""
+    results = {}
+    for name, renderer in (
+        ("encode-json", JSONRenderer()),
+        ("encode-fast", FastJSONRenderer()),
+    ):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            content = renderer.render(rows)
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            "rows": len(rows),
+            "bytes": len(content),
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+        }
+    return results
+
+
+def employee_rows(count):
+    return EmployeeValuesSerializer(
+        EmployeeValuesSerializer.get_values(
+            Employee.objects.order_by("id")[:count]
+        ),
+        many=True,
+    ).data
+
+
+def measure_connection_overhead(
+    data, requests, concurrency, max_age, path="/api/v1/employees/"
+):
+    """Прогоняет ``requests`` запросов к ``path`` через WSGI-обработчик в
+    ``concurrency`` потоках, как многопоточный сервер, при
+    ``CONN_MAX_AGE=max_age`` и считает открытые соединения с БД.
+
+    Тестовый клиент отключает закрытие соединений по сигналам
+    request_started и request_finished, поэтому запросы идут в
+    ``WSGIHandler`` напрямую.
+    """
+    handler = WSGIHandler()
+    token = get_tokens_for_user(data.owner)["access"]
+    environ = (
+        RequestFactory()
+        .get(path, HTTP_AUTHORIZATION=f"Bearer {token}")
+        .environ
+    )
+    lock = threading.Lock()
+    opened = 0
+    timings = []
+    errors = 0
+
+    def on_connection_created(sender, connection, **kwargs):
+        nonlocal opened
+        with lock:
+            opened += 1
+
+    def worker(count):
+        nonlocal errors
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                response = handler(dict(environ), lambda *args: None)
+                try:
+                    b"".join(response)
+                finally:
+                    response.close()
+                with lock:
+                    timings.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        errors += 1
+        finally:
+            connections.close_all()
+
+    old_max_age = connection.settings_dict["CONN_MAX_AGE"]
+    connection.settings_dict["CONN_MAX_AGE"] = max_age
+    connection_created.connect(on_connection_created)
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(
+                requests // concurrency + (number < requests % concurrency),
+            ),
+        )
+        for number in range(concurrency)
+    ]
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        elapsed = time.perf_counter() - started
+        connection_created.disconnect(on_connection_created)
+        connection.settings_dict["CONN_MAX_AGE"] = old_max_age
+    return {
+        "max_age": max_age,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "connections": opened,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+    }
+
+
+def compare(results, baseline, max_regression, max_queries=None):
+    """Список нарушений порогов по сравнению с предыдущим прогоном."""
+    failures = []
+    for name, result in results.items():
+        if result["status"] >= 500:
+            failures.append(f"{name}: ответ {result['status']}")
+        if max_queries is not None and result["queries"] > max_queries:
+            failures.append(
+                f"{name}: {result['queries']} запросов, "
+                f"допустимо не более {max_queries}"
+            )
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous is None:
+            continue
+        if result["queries"] > previous["queries"]:
+            failures.append(
+                f"{name}: запросов {result['queries']}, "
+                f"было {previous['queries']}"
+            )
+        limit = previous["p95_ms"] * (1 + max_regression)
+        if result["p95_ms"] > limit:
+            failures.append(
+                f"{name}: p95 {result['p95_ms']} мс, "
+                f"было {previous['p95_ms']} мс"
+            )
+    return failures
+
+
+def build_report(results, **meta):
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            **meta,
+        },
+        "results": results,
+    }
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as report:
+        return json.load(report)
@@ -0,0 +1,152 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import replica_may_lag
+
+EMPLOYEES = "employees"
+ORGANIZATIONS = "organizations"
+
+VERSION_CACHE_KEY = "api-version:{name}"
+RESPONSE_CACHE_KEY = "api-response:{digest}"
+DEFAULT_API_CACHE_TIMEOUT = 300
+
+
+def organization_scope(organization_id):
+    return f"organization:{organization_id}"
+
+
+def employee_scope(employee_id):
+    return f"employee:{employee_id}"
+
+
+def _response_cache_timeout():
+    return getattr(settings, "API_CACHE_TIMEOUT", 0)
+
+
+def touch(*scopes):
+    """Отмечает изменение данных: ответы, зависящие от этих областей,
+    перестают совпадать по ключу и ETag.
+
+    Версии обновляются после коммита: иначе параллельный запрос успел
+    бы закэшировать под новой версией данные до изменения.
+    """
+    if not _response_cache_timeout() or not scopes:
+        return
+    transaction.on_commit(lambda: _set_versions(scopes))
+
+
+def _set_versions(scopes):
+    now = time.time()
+    cache.set_many(
+        {VERSION_CACHE_KEY.format(name=scope): now for scope in scopes},
+        None,
+    )
+
+
+def touch_organizations(*organization_ids):
+    touch(ORGANIZATIONS, *map(organization_scope, organization_ids))
+
+
+def touch_employees(*employee_ids):
+    touch(EMPLOYEES, *map(employee_scope, employee_ids))
+
+
+def get_versions(scopes):
+    keys = [VERSION_CACHE_KEY.format(name=scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time()
+        for key in missing:
+            cache.add(key, now, None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+class CachedResponseMixin:
+    """Кэширует ответы list и retrieve и поддерживает условные запросы.
+
+    Ключ строится из пользователя, пути, параметров запроса и версий
+    областей данных, от которых зависит ответ. Версия — время последнего
+    изменения области, её обновляют сигналы моделей, поэтому и ETag, и
+    Last-Modified вычисляются без обращения к БД.
+    """
+
+    def get_list_cache_scopes(self):
+        return []
+
+    def get_detail_cache_scopes(self):
+        return []
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            self.get_list_cache_scopes(), super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            self.get_detail_cache_scopes(),
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
+
+    def cached_response(self, scopes, handler, *args, **kwargs):
+        timeout = _response_cache_timeout()
+        if not timeout:
+            return handler(self.request, *args, **kwargs)
+        request = self.request
+        versions = get_versions(scopes)
+        digest = hashlib.sha1(
+            repr(
+                (
+                    request.user.pk,
+                    request.path,
+                    sorted(request.query_params.lists()),
+                    request.accepted_media_type,
+                    versions,
+                )
+            ).encode()
+        ).hexdigest()
+        etag = quote_etag(digest)
+        last_modified = int(max(versions, default=0))
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = RESPONSE_CACHE_KEY.format(digest=digest)
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                # Отстающая реплика могла отдать данные до изменения:
+                # под новой версией их не кэшируем.
+                if not replica_may_lag(max(versions, default=0)):
+                    cache.set(key, response.data, timeout)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return etag in tags or "*" in tags
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since", "")
+        )
+        return (
+            if_modified_since is not None
+            and last_modified <= if_modified_since
+        )
@@ -0,0 +1,81 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (Organization, OrganizationEmployeeRelation,
+                     OrganizationUserRelation)
+
+RECONCILE_BATCH_SIZE = 500
+
+COUNTERS = {
+    "employee_count": (OrganizationEmployeeRelation, "employee"),
+    "editor_count": (OrganizationUserRelation, "user"),
+}
+
+
+def counter_subquery(relation_model, related_field):
+    """Число связей организации, у которых не обнулена вторая сторона.
+
+    При удалении сотрудника или пользователя связь остаётся с ``NULL``,
+    такие строки не считаются.
+    """
+    return Coalesce(
+        Subquery(
+            relation_model.objects.filter(
+                organization=OuterRef("pk"),
+                **{f"{related_field}__isnull": False},
+            )
+            .order_by()
+            .values("organization")
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def actual_counters():
+    return {
+        name: counter_subquery(relation_model, related_field)
+        for name, (relation_model, related_field) in COUNTERS.items()
+    }
+
+
+def refresh_counters(*organization_ids):
+    """Пересчитывает счётчики организаций одним UPDATE.
+
+    Значения берутся из таблиц связей в том же запросе, поэтому
+    выполняется внутри текущей транзакции и не накапливает ошибок при
+    параллельных изменениях.
+    """
+    organization_ids = {pk for pk in organization_ids if pk is not None}
+    if not organization_ids:
+        return 0
+    return Organization.objects.filter(pk__in=organization_ids).update(
+        modified_at=timezone.now(), **actual_counters()
+    )
+
+
+def reconcile_counters(organizations=None, batch_size=RECONCILE_BATCH_SIZE):
+    """Исправляет расхождения счётчиков с таблицами связей.
+
+    Возвращает число исправленных организаций. Время изменения у
+    организаций без расхождений не трогается.
+    """
+    if organizations is None:
+        organizations = Organization.objects.all()
+    actual = {
+        f"actual_{name}": value for name, value in actual_counters().items()
+    }
+    stale_ids = list(
+        organizations.annotate(**actual)
+        .exclude(
+            **{name: F(f"actual_{name}") for name in COUNTERS},
+        )
+        .values_list("pk", flat=True)
+    )
+    fixed = 0
+    for start in range(0, len(stale_ids), batch_size):
+        fixed += refresh_counters(*stale_ids[start : start + batch_size])
+    return fixed
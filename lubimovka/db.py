@@ -0,0 +1,81 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Выставляет ``SQLITE_PRAGMAS`` новому соединению с SQLite.
+
+    PRAGMA выполняются в обход курсора Django, чтобы не попадать в
+    подсчёт запросов профилировщика и тестов.
+    """
+    if connection.vendor != "sqlite":
+        return
+    for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def check_connections_health(**kwargs):
+    """Помечает постоянные соединения для проверки перед первым
+    использованием в запросе.
+
+    Аналог ``CONN_HEALTH_CHECKS`` из Django 4.1: соединение, открытое
+    прошлым запросом, проверяется ``is_usable()`` при первом обращении к
+    БД, и оборванное заменяется новым вместо ошибки. Сама пометка
+    запросов к БД не делает: псевдонимы, к которым запрос не обращается,
+    не проверяются. Соединения, которые закрываются после каждого
+    запроса, сюда не доходят открытыми.
+    """
+    for connection in connections.all():
+        if connection.connection is None or not connection.settings_dict.get(
+            "CONN_HEALTH_CHECKS"
+        ):
+            continue
+        # Каждый запрос к БД проходит через ensure_connection(); в Django
+        # 3.2 метод не проверяет соединение, поэтому он один раз
+        # подменяется у самого объекта соединения.
+        if "ensure_connection" not in vars(connection):
+            connection.ensure_connection = partial(
+                _ensure_healthy_connection, connection
+            )
+        connection.health_check_done = False
+
+
+def _ensure_healthy_connection(connection):
+    if not getattr(connection, "health_check_done", True):
+        connection.health_check_done = True
+        if (
+            connection.connection is not None
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
+    type(connection).ensure_connection(connection)
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill(queryset, fields, fill, batch_size=BACKFILL_BATCH_SIZE):
+    """Заполняет поля ``fields`` строк ``queryset`` пачками по первичному
+    ключу.
+
+    ``fill(obj)`` выставляет поля объекта; в памяти одновременно только
+    одна пачка, каждая сохраняется одним ``bulk_update``. Подходит и для
+    исторических моделей в миграциях. Возвращает число строк.
+    """
+    manager = queryset.model._base_manager.db_manager(queryset.db)
+    queryset = queryset.order_by("pk")
+    last_pk = None
+    total = 0
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            return total
+        for obj in batch:
+            fill(obj)
+        manager.bulk_update(batch, fields)
+        total += len(batch)
+        last_pk = batch[-1].pk
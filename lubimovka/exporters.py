@@ -0,0 +1,73 @@
+import csv
+
+from django.db.models import F
+
+from .importers import CSV, JSONL
+from .phones import stored_phone_number
+from .renderers import dumps
+
+CONTENT_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    JSONL: "application/x-ndjson; charset=utf-8",
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = {
+    "organization_id": F("id"),
+    "organization_title": F("title"),
+    "organization_address": F("address"),
+    "organization_description": F("description"),
+    "employee_id": F("employees__id"),
+    "employee_name": F("employees__name"),
+    "employee_surname": F("employees__surname"),
+    "employee_patronymic": F("employees__patronymic"),
+    "employee_position": F("employees__position"),
+    "employee_work_phone_number": stored_phone_number(
+        "employees__work_phone_number"
+    ),
+    "employee_personal_phone_number": stored_phone_number(
+        "employees__personal_phone_number"
+    ),
+    "employee_fax": stored_phone_number("employees__fax"),
+}
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу отдаёт записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(organizations, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Строки выгрузки: организация и один её сотрудник на строку.
+
+    Один запрос с LEFT JOIN читается через ``iterator()``: в PostgreSQL
+    это серверный курсор, поэтому память не зависит от объёма выгрузки.
+    Организации без сотрудников попадают в выгрузку с пустыми полями
+    сотрудника.
+    """
+    return (
+        organizations.order_by()
+        .values(**EXPORT_COLUMNS)
+        .order_by("title", "id", "employees__id")
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def export_jsonl(rows):
+    for row in rows:
+        yield dumps(row) + b"\n"
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+EXPORTERS = {
+    CSV: export_csv,
+    JSONL: export_jsonl,
+}
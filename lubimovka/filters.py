@@ -0,0 +1,110 @@
+from django.db import connections
+from django.db.models import Q
+from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+from rest_framework.filters import OrderingFilter
+
+from .models import Employee
+from .phones import normalize_phone_number
+
+# Больше любого символа строки: верхняя граница диапазона для префикса.
+MAX_CHAR = "\U0010ffff"
+
+PHONE_NORMALIZED_FIELDS = (
+    "work_phone_normalized",
+    "personal_phone_normalized",
+    "fax_normalized",
+)
+
+
+def prefix_lookups(qs, field_name, value):
+    lookups = {f"{field_name}__startswith": value}
+    if connections[qs.db].vendor == "sqlite":
+        lookups[f"{field_name}__gte"] = value
+        lookups[f"{field_name}__lt"] = value + MAX_CHAR
+    return lookups
+
+
+class PrefixFilter(filters.CharFilter):
+    """Начало строки с учётом регистра.
+
+    LIKE в SQLite не различает регистр и поэтому не использует индекс;
+    условие на диапазон ``[префикс, префикс + MAX_CHAR)`` использует его
+    и оставляет только строки с точным началом. В PostgreSQL LIKE
+    'префикс%' использует индекс при сортировке строк по локали C.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return qs.filter(**prefix_lookups(qs, self.field_name, value))
+
+
+class PhoneFilter(filters.CharFilter):
+    """Номер телефона в любом написании сравнивается по цифрам.
+
+    Ищет по нормализованным колонкам ``field_names``, у каждой свой
+    индекс; при ``prefix=True`` — по началу номера, так что «+7 912» и
+    «7912» находят одни и те же номера.
+    """
+
+    def __init__(self, *args, field_names=(), prefix=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field_names = field_names
+        self.prefix = prefix
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        digits = normalize_phone_number(value)
+        if digits is None:
+            return qs.none()
+        condition = Q()
+        for field_name in self.field_names:
+            if self.prefix:
+                condition |= Q(**prefix_lookups(qs, field_name, digits))
+            else:
+                condition |= Q(**{field_name: digits})
+        return qs.filter(condition)
+
+
+class EmployeeFilter(filters.FilterSet):
+    """Фильтры списка сотрудников; каждый опирается на индекс."""
+
+    surname_prefix = PrefixFilter(
+        field_name="surname", label="Фамилия начинается с"
+    )
+    position_prefix = PrefixFilter(
+        field_name="position", label="Должность начинается с"
+    )
+    organization = filters.NumberFilter(
+        field_name="organizationemployeerelation__organization",
+        label="id организации",
+    )
+    phone = PhoneFilter(
+        field_names=PHONE_NORMALIZED_FIELDS, label="Номер телефона"
+    )
+    phone_prefix = PhoneFilter(
+        field_names=PHONE_NORMALIZED_FIELDS,
+        prefix=True,
+        label="Номер телефона начинается с",
+    )
+
+    class Meta:
+        model = Employee
+        fields = ("surname", "position")
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Сортировка из белого списка ``ordering_fields``, дополненная id.
+
+    Курсорная пагинация требует однозначного порядка, а индексы
+    ``(поле, id)`` отдают строки именно в нём.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            descending = ordering and ordering[-1].startswith("-")
+            ordering.append("-id" if descending else "id")
+        return ordering
@@ -0,0 +1,246 @@
+import csv
+import json
+from collections import defaultdict, deque
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Max
+
+from .cache import touch_employees
+from .models import Employee, OrganizationEmployeeRelation
+from .signals import organization_employees_changed
+
+CSV = "csv"
+JSONL = "jsonl"
+FILE_FORMATS = (CSV, JSONL)
+
+EMPLOYEE_IMPORT_FIELDS = (
+    "name",
+    "surname",
+    "patronymic",
+    "position",
+    "work_phone_number",
+    "personal_phone_number",
+    "fax",
+)
+PHONE_FIELDS = ("work_phone_number", "personal_phone_number", "fax")
+# Поля, по которым созданная строка сопоставляется с объектом, когда БД
+# не возвращает id из bulk_create. Номера берутся нормализованными,
+# чтобы сравнивать строки, а не объекты PhoneNumber.
+NATURAL_KEY = (
+    "name",
+    "surname",
+    "patronymic",
+    "position",
+    "work_phone_normalized",
+    "personal_phone_normalized",
+    "fax_normalized",
+)
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+PERSONAL_PHONE_TAKEN = "Личный номер телефона должен быть уникальным."
+
+
+def guess_file_format(filename):
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return JSONL
+    return CSV
+
+
+def read_rows(lines, file_format):
+    """Построчно читает CSV или JSONL, не загружая файл целиком.
+
+    Возвращает пары (номер строки, словарь полей); строка JSONL, которую
+    не удалось разобрать, передаётся как исключение ValidationError.
+    """
+    if file_format == CSV:
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            row = ValidationError("Строка не является JSON-объектом.")
+        yield line_number, row
+
+
+def error_messages(error):
+    if hasattr(error, "error_dict"):
+        return error.message_dict
+    return error.messages
+
+
+class EmployeeImporter:
+    """Массовое создание сотрудников пачками фиксированного размера.
+
+    Память ограничена размером пачки: номера телефонов проверяются на
+    уникальность по множеству внутри пачки и одним запросом к БД.
+    """
+
+    def __init__(
+        self,
+        organization=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        using=None,
+    ):
+        self.organization = organization
+        self.batch_size = batch_size
+        self.using = using or router.db_for_write(Employee)
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        return self.result()
+
+    def result(self):
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    def add_error(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line_number, "errors": errors})
+
+    def build_employee(self, row):
+        values = {}
+        errors = {}
+        for name in EMPLOYEE_IMPORT_FIELDS:
+            field = Employee._meta.get_field(name)
+            try:
+                values[name] = field.clean(row.get(name) or "", None)
+            except ValidationError as error:
+                errors[name] = error.messages
+        if errors:
+            raise ValidationError(errors)
+        if not any(values[name] for name in PHONE_FIELDS):
+            raise ValidationError(
+                "Необходимо указать хотя бы один номер телефона."
+            )
+        employee = Employee(**values)
+        employee.fill_computed_fields()
+        return employee
+
+    def import_batch(self, batch):
+        employees = []
+        personal_phones = {}
+        for line_number, row in batch:
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                employee = self.build_employee(row)
+            except ValidationError as error:
+                self.add_error(line_number, error_messages(error))
+                continue
+            phone = employee.personal_phone_normalized
+            if phone is not None:
+                if phone in personal_phones:
+                    self.add_error(
+                        line_number,
+                        ["Личный номер телефона повторяется в файле."],
+                    )
+                    continue
+                personal_phones[phone] = line_number
+            employees.append((line_number, employee))
+        taken = set(
+            Employee.objects.using(self.using)
+            .filter(personal_phone_normalized__in=personal_phones)
+            .values_list("personal_phone_normalized", flat=True)
+        )
+        valid = []
+        for line_number, employee in employees:
+            if employee.personal_phone_normalized in taken:
+                self.add_error(line_number, [PERSONAL_PHONE_TAKEN])
+            else:
+                valid.append((line_number, employee))
+        if not valid:
+            return
+        try:
+            with transaction.atomic(using=self.using):
+                self.save_employees([employee for _, employee in valid])
+            self.created += len(valid)
+            self.notify_changes()
+        except IntegrityError:
+            # Номер успели занять параллельно: сохраняем строки по одной,
+            # чтобы сообщить об ошибке только для конфликтующих.
+            for line_number, employee in valid:
+                employee.pk = None
+                try:
+                    with transaction.atomic(using=self.using):
+                        self.save_employees([employee])
+                    self.created += 1
+                except IntegrityError as error:
+                    if not Employee.is_personal_phone_conflict(error):
+                        raise
+                    self.add_error(line_number, [PERSONAL_PHONE_TAKEN])
+            self.notify_changes()
+
+    def notify_changes(self):
+        # bulk_create не отправляет сигналы моделей.
+        touch_employees()
+        if self.organization is not None:
+            organization_employees_changed(self.organization.pk)
+
+    def save_employees(self, employees):
+        manager = Employee.objects.using(self.using)
+        if self.organization is None:
+            manager.bulk_create(employees)
+            return
+        if connections[self.using].features.can_return_rows_from_bulk_insert:
+            manager.bulk_create(employees)
+        else:
+            last_pk = manager.aggregate(last_pk=Max("pk"))["last_pk"] or 0
+            manager.bulk_create(employees)
+            self.recover_ids(employees, last_pk)
+        OrganizationEmployeeRelation.objects.using(self.using).bulk_create(
+            [
+                OrganizationEmployeeRelation(
+                    employee=employee, organization=self.organization
+                )
+                for employee in employees
+            ]
+        )
+
+    def recover_ids(self, employees, last_pk):
+        """Находит id сотрудников, созданных ``bulk_create`` без
+        RETURNING (SQLite, MySQL в Django 3.2), одним запросом.
+
+        Новые строки ищутся после ``last_pk`` и сопоставляются с
+        объектами по ``NATURAL_KEY``; одинаковые строки получают id по
+        порядку вставки.
+        """
+        ids = defaultdict(deque)
+        for pk, *key in (
+            Employee.objects.using(self.using)
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", *NATURAL_KEY)
+        ):
+            ids[tuple(key)].append(pk)
+        for employee in employees:
+            employee.pk = ids[
+                tuple(getattr(employee, name) for name in NATURAL_KEY)
+            ].popleft()
+
+
+def import_employees(
+    lines, file_format, organization=None, batch_size=DEFAULT_BATCH_SIZE
+):
+    importer = EmployeeImporter(organization, batch_size)
+    return importer.run(read_rows(lines, file_format))
@@ -0,0 +1,133 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from lubimovka.benchmarks import (build_report, compare, employee_rows,
+                                  load_report, measure_encoding, run_benchmark,
+                                  seed)
+from lubimovka.cache import DEFAULT_API_CACHE_TIMEOUT
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет число запросов, задержку p50/p95 и пиковую память для "
+        "маршрутов API на синтетических данных во временной БД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organizations", type=int, default=100)
+        parser.add_argument(
+            "--employees",
+            type=int,
+            default=50,
+            help="Сотрудников в каждой организации",
+        )
+        parser.add_argument(
+            "--editors",
+            type=int,
+            default=5,
+            help="Редакторов в каждой организации",
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--output", help="Файл для отчёта в JSON")
+        parser.add_argument(
+            "--baseline", help="Отчёт предыдущего прогона для сравнения"
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=0.25,
+            help="Допустимый рост p95 относительно baseline, доля",
+        )
+        parser.add_argument(
+            "--max-queries",
+            type=int,
+            help="Допустимое число запросов к БД на один запрос к API",
+        )
+        parser.add_argument(
+            "--encode-rows",
+            type=int,
+            default=0,
+            help="Сравнить скорость кодирования JSON на N сотрудниках",
+        )
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Включить кэш ответов API",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            baseline = load_report(options["baseline"])
+        if not options["with_cache"]:
+            cache_timeout = 0
+        else:
+            # Прогон идёт в одном процессе, кэша в памяти достаточно.
+            cache_timeout = (
+                settings.API_CACHE_TIMEOUT or DEFAULT_API_CACHE_TIMEOUT
+            )
+        with override_settings(API_CACHE_TIMEOUT=cache_timeout):
+            results, encoding = self.run(options)
+        report = build_report(
+            results,
+            organizations=options["organizations"],
+            employees=options["employees"],
+            editors=options["editors"],
+            iterations=options["iterations"],
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:28} {result['status']:>4} "
+                f"queries={result['queries']:<4} "
+                f"p50={result['p50_ms']:>9.3f}ms "
+                f"p95={result['p95_ms']:>9.3f}ms "
+                f"peak={result['peak_memory_kb']:>9.1f}KiB"
+            )
+        for name, result in encoding.items():
+            self.stdout.write(
+                f"{name:28} rows={result['rows']:<7} "
+                f"bytes={result['bytes']:<9} "
+                f"p50={result['p50_ms']:>9.3f}ms "
+                f"p95={result['p95_ms']:>9.3f}ms"
+            )
+        if encoding:
+            report["encoding"] = encoding
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        failures = compare(
+            results,
+            baseline,
+            options["max_regression"],
+            options["max_queries"],
+        )
+        if failures:
+            raise CommandError("Пороги превышены:\n" + "\n".join(failures))
+
+    def run(self, options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            data = seed(
+                options["organizations"],
+                options["employees"],
+                options["editors"],
+            )
+            results = run_benchmark(data, options["iterations"])
+            encoding = {}
+            if options["encode_rows"]:
+                encoding = measure_encoding(
+                    employee_rows(options["encode_rows"]),
+                    options["iterations"],
+                )
+            return results, encoding
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
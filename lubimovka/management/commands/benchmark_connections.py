@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from lubimovka.benchmarks import measure_connection_overhead, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает накладные расходы на соединения с БД без "
+        "переиспользования (CONN_MAX_AGE=0) и с постоянными соединениями "
+        "под параллельной нагрузкой во временной БД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organizations", type=int, default=20)
+        parser.add_argument("--employees", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=settings.DATABASE_CONN_MAX_AGE or 60,
+            help="CONN_MAX_AGE для прогона с постоянными соединениями",
+        )
+        parser.add_argument(
+            "--path",
+            default="/api/v1/employees/",
+            help="Маршрут, к которому идут запросы",
+        )
+        parser.add_argument("--output", help="Файл для отчёта в JSON")
+
+    def handle(self, *args, **options):
+        settings.API_CACHE_TIMEOUT = 0
+        temp_dir = None
+        if connection.vendor == "sqlite":
+            # Соединения с тестовой БД в памяти SQLite не закрывает, и
+            # разницы не было бы видно.
+            temp_dir = tempfile.mkdtemp()
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = (
+                os.path.join(temp_dir, "benchmark.sqlite3")
+            )
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            data = seed(options["organizations"], options["employees"], 1)
+            results = [
+                measure_connection_overhead(
+                    data,
+                    options["requests"],
+                    options["concurrency"],
+                    max_age,
+                    options["path"],
+                )
+                for max_age in (0, options["max_age"])
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        for result in results:
+            self.stdout.write(
+                f"CONN_MAX_AGE={result['max_age']:<5} "
+                f"connections={result['connections']:<6} "
+                f"errors={result['errors']:<4} "
+                f"rps={result['rps']:>8.1f} "
+                f"p50={result['p50_ms']:>8.3f}ms "
+                f"p95={result['p95_ms']:>8.3f}ms"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from lubimovka.benchmarks import seed
+from lubimovka.query_plans import check_query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет запросы маршрутов API на синтетических данных во "
+        "временной БД и проверяет через EXPLAIN, что они не читают "
+        "таблицы целиком."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organizations", type=int, default=200)
+        parser.add_argument("--employees", type=int, default=20)
+        parser.add_argument("--editors", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with override_settings(API_CACHE_TIMEOUT=0):
+            checked, problems = self.run_checks(options)
+        for problem in problems:
+            self.stderr.write(
+                f"{problem.scenario}: полный проход по {problem.table}\n"
+                f"  {problem.sql}\n  " + "\n  ".join(problem.plan)
+            )
+        if problems:
+            raise CommandError(
+                f"Полных проходов по таблицам: {len(problems)} "
+                f"из {checked} запросов."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Проверено запросов: {checked}.")
+        )
+
+    def run_checks(self, options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            data = seed(
+                options["organizations"],
+                options["employees"],
+                options["editors"],
+            )
+            with connection.cursor() as cursor:
+                if connection.vendor == "sqlite":
+                    cursor.execute("ANALYZE")
+            return check_query_plans(data)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
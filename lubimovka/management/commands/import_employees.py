@@ -0,0 +1,59 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lubimovka.importers import (DEFAULT_BATCH_SIZE, FILE_FORMATS,
+                                 guess_file_format, import_employees)
+from lubimovka.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Импортирует сотрудников из файла CSV или JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу или «-» для stdin")
+        parser.add_argument("--file-format", choices=FILE_FORMATS)
+        parser.add_argument(
+            "--organization",
+            type=int,
+            help="id организации, в которую добавить сотрудников",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        organization = None
+        if options["organization"] is not None:
+            organization = Organization.objects.filter(
+                pk=options["organization"]
+            ).first()
+            if organization is None:
+                raise CommandError("Организация не найдена.")
+        path = options["path"]
+        file_format = options["file_format"] or guess_file_format(path)
+        if path == "-":
+            result = self.import_file(
+                sys.stdin, file_format, organization, options["batch_size"]
+            )
+        else:
+            with open(path, encoding="utf-8-sig", newline="") as lines:
+                result = self.import_file(
+                    lines, file_format, organization, options["batch_size"]
+                )
+        for error in result["errors"]:
+            self.stderr.write(f"Строка {error['row']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано сотрудников: {result['created']}, "
+                f"ошибок: {result['failed']}."
+            )
+        )
+
+    def import_file(self, lines, file_format, organization, batch_size):
+        return import_employees(
+            lines,
+            file_format,
+            organization=organization,
+            batch_size=batch_size,
+        )
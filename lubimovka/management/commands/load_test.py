@@ -0,0 +1,125 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lubimovka.profiling import percentile
+
+SYNC_PREFIX = "/api/v1/"
+ASYNC_PREFIX = "/api/v1/async/"
+DEFAULT_PATHS = ("organizations/", "employees/")
+
+
+async def fetch(host, port, path, headers, read_delay):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}"]
+        lines += headers
+        lines += ["Connection: close", "", ""]
+        writer.write("\r\n".join(lines).encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        # Медленный клиент: ответ уже готов, но читается с задержкой.
+        if read_delay:
+            await asyncio.sleep(read_delay)
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def run_load(url, requests, concurrency, headers, read_delay):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+    timings = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                status = await fetch(
+                    parts.hostname, parts.port or 80, path, headers, read_delay
+                )
+            except OSError:
+                status = None
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(timings, 0.5), 1),
+        "p95_ms": round(percentile(timings, 0.95), 1),
+        "errors": errors,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает запущенный сервер параллельными запросами и сравнивает "
+        "синхронный путь /api/v1/ с асинхронным /api/v1/async/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default="http://127.0.0.1:8000",
+            help="Адрес сервера, например запущенного через uvicorn",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Путь относительно /api/v1/, можно указать несколько раз",
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--header",
+            action="append",
+            dest="headers",
+            default=[],
+            help="Заголовок запроса, например «Authorization: Bearer …»",
+        )
+        parser.add_argument(
+            "--read-delay",
+            type=float,
+            default=0.0,
+            help="Задержка чтения ответа клиентом, секунды",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("Число запросов и потоков должно быть > 0.")
+        base_url = options["base_url"].rstrip("/")
+        for path in options["paths"] or DEFAULT_PATHS:
+            for name, prefix in (
+                ("sync", SYNC_PREFIX),
+                ("async", ASYNC_PREFIX),
+            ):
+                url = f"{base_url}{prefix}{path.lstrip('/')}"
+                result = asyncio.run(
+                    run_load(
+                        url,
+                        options["requests"],
+                        options["concurrency"],
+                        options["headers"],
+                        options["read_delay"],
+                    )
+                )
+                self.stdout.write(
+                    f"{name:5} {path:32} rps={result['rps']:<8} "
+                    f"p50={result['p50_ms']:>8}ms "
+                    f"p95={result['p95_ms']:>8}ms "
+                    f"errors={result['errors']}"
+                )
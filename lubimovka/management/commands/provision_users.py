@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lubimovka.importers import FILE_FORMATS, guess_file_format, read_rows
+from lubimovka.models import User
+from lubimovka.provisioning import create_hashing_executor
+
+
+class Command(BaseCommand):
+    help = (
+        "Массово создаёт пользователей из CSV или JSONL с колонками email "
+        "и password; пароли хэшируются в пуле процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл с пользователями")
+        parser.add_argument(
+            "--format",
+            choices=FILE_FORMATS,
+            help="Формат файла; по умолчанию по расширению",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Процессов для хэширования; 1 — без пула. По умолчанию "
+            "PASSWORD_HASHING_WORKERS или число ядер",
+        )
+        parser.add_argument("--output", help="Файл для отчёта в JSON")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or guess_file_format(path)
+        executor = None
+        if options["workers"] != 1:
+            executor = create_hashing_executor(options["workers"])
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as lines:
+                result = User.objects.bulk_create_users(
+                    read_rows(lines, file_format),
+                    batch_size=options["batch_size"],
+                    executor=executor,
+                )
+        except OSError as error:
+            raise CommandError(error)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        for invalid in result.invalid:
+            self.stderr.write(
+                f"Строка {invalid['row']}: " + " ".join(invalid["errors"])
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(
+                    result.as_dict(), output, ensure_ascii=False, indent=2
+                )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано: {result.created}, "
+                f"уже были: {len(result.existing)}, "
+                f"повторы: {len(result.duplicates)}, ошибки: "
+                f"{len(result.invalid)}. {result.elapsed:.2f} с, "
+                f"{result.users_per_second} пользователей/с."
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from lubimovka.models import Employee
+from lubimovka.search import rebuild_search_index
+from lubimovka.tasks import refresh_employee_fields
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает поисковые документы сотрудников и индекс поиска."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        database = options["database"]
+        updated = refresh_employee_fields(
+            Employee.objects.using(database),
+            ["search_document"],
+            options["batch_size"],
+        )
+        rebuild_search_index(connections[database])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обновлено поисковых документов: {updated}. "
+                "Индекс перестроен."
+            )
+        )
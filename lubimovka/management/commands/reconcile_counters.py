@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from lubimovka.counters import RECONCILE_BATCH_SIZE, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет счётчики сотрудников и редакторов организаций с таблицами "
+        "связей и исправляет расхождения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=RECONCILE_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Исправлено организаций: {fixed}.")
+        )
@@ -0,0 +1,112 @@
+import multiprocessing
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from lubimovka.tasks import (claim_tasks, execute_task, extend_leases,
+                             purge_finished_tasks, task_lease)
+
+
+class Command(BaseCommand):
+    help = (
+        "Обработчик очереди фоновых задач: забирает задачи из БД и "
+        "выполняет их в пуле потоков или процессов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "TASK_WORKERS", 4),
+            help="Размер пула",
+        )
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Пул процессов вместо пула потоков, для задач, которые "
+            "упираются в процессор",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Пауза между опросами пустой очереди, секунды",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить доступные задачи и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        poll_interval = options["poll_interval"]
+        keep_done = getattr(settings, "TASK_KEEP_DONE", 7 * 24 * 60 * 60)
+        purged = purge_finished_tasks(timedelta(seconds=keep_done))
+        if purged:
+            self.stdout.write(f"Удалено выполненных задач: {purged}.")
+        if options["processes"]:
+            # Процессы запускаются заново, а не через fork, чтобы не
+            # унаследовать открытые соединения с БД.
+            executor = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        else:
+            executor = ThreadPoolExecutor(
+                workers, thread_name_prefix="lubimovka-task"
+            )
+        running = {}
+        results = {}
+        # Захват продлевается, когда прошла треть срока: задача, которая
+        # выполняется дольше TASK_LEASE, не достаётся другому обработчику.
+        heartbeat = task_lease().total_seconds() / 3
+        extended_at = time.monotonic()
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() - extended_at >= heartbeat:
+                    extend_leases(list(running.values()))
+                    extended_at = time.monotonic()
+                claimed = claim_tasks(workers - len(running))
+                running.update(
+                    (executor.submit(execute_task, task_id), task_id)
+                    for task_id in claimed
+                )
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                done, _ = wait(
+                    running, timeout=poll_interval, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    del running[future]
+                    error = future.exception()
+                    if error is not None:
+                        # Результат задачи не записан: она вернётся в
+                        # очередь по истечении locked_until.
+                        self.stderr.write(f"Ошибка обработчика: {error!r}")
+                        status = "error"
+                    else:
+                        status = future.result()
+                    results[status] = results.get(status, 0) + 1
+        except KeyboardInterrupt:
+            self.stdout.write("Ожидание выполняемых задач...")
+        finally:
+            executor.shutdown(wait=True)
+            close_old_connections()
+        summary = ", ".join(
+            f"{status}: {count}" for status, count in sorted(results.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Задачи обработаны. {summary}".strip())
+        )
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+
+def is_api_request(request):
+    return request.path_info.startswith(
+        getattr(settings, "API_PATH_PREFIX", "/api/")
+    )
+
+
+def is_token_api_request(request):
+    """Запрос к API без cookie сессии: клиент аутентифицируется по
+    токену, и сессия ему не нужна."""
+    return (
+        is_api_request(request)
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+class SkipForApiMixin:
+    """Пропускает middleware для запросов к API без сессии.
+
+    Такие клиенты аутентифицируются по токену и не пользуются ни
+    сессией, ни сообщениями. Запросы с cookie сессии — браузерный API и
+    клиенты с SessionAuthentication — проходят всю цепочку, включая
+    CSRF. Если следующее звено асинхронное, ``get_response`` вернёт
+    корутину, и обработчик дождётся её сам.
+    """
+
+    def __call__(self, request):
+        if is_token_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class WebSessionMiddleware(SkipForApiMixin, SessionMiddleware):
+    pass
+
+
+class WebCsrfViewMiddleware(SkipForApiMixin, CsrfViewMiddleware):
+    pass
+
+
+class WebAuthenticationMiddleware(SkipForApiMixin, AuthenticationMiddleware):
+    pass
+
+
+class WebMessageMiddleware(SkipForApiMixin, MessageMiddleware):
+    pass
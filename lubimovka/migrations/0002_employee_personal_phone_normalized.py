@@ -0,0 +1,62 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:43
+
+import logging
+
+from django.db import migrations, models
+
+from lubimovka.db import backfill
+from lubimovka.phones import normalize_phone_number
+
+logger = logging.getLogger(__name__)
+
+
+def fill_personal_phone_normalized(apps, schema_editor):
+    Employee = apps.get_model("lubimovka", "Employee")
+    seen = set()
+    duplicates = []
+
+    def fill(employee):
+        normalized = normalize_phone_number(employee.personal_phone_number)
+        # Дубликаты, оставшиеся от старой проверки, не получают ключ:
+        # уникальность гарантируется для первого сотрудника с номером.
+        if normalized in seen:
+            duplicates.append(employee.pk)
+            normalized = None
+        elif normalized is not None:
+            seen.add(normalized)
+        employee.personal_phone_normalized = normalized
+
+    backfill(
+        Employee.objects.using(schema_editor.connection.alias),
+        ["personal_phone_normalized"],
+        fill,
+    )
+    if duplicates:
+        logger.warning(
+            "Личный номер телефона повторяется, нормализованный номер не "
+            "заполнен у сотрудников: %s",
+            ", ".join(map(str, duplicates)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lubimovka', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='personal_phone_normalized',
+            field=models.CharField(editable=False, max_length=20, null=True, verbose_name='Личный номер телефона (только цифры)'),
+        ),
+        migrations.RunPython(
+            fill_personal_phone_normalized, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='personal_phone_normalized',
+            field=models.CharField(editable=False, max_length=20, null=True, unique=True, verbose_name='Личный номер телефона (только цифры)'),
+        ),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+from lubimovka.db import backfill
+
+# Индекс и документ — в том виде, в каком их ввела эта миграция; код
+# приложения может меняться, миграция — нет.
+SQLITE_INDEX_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lubimovka_employee_fts USING fts5("
+    "search_document, content='lubimovka_employee', content_rowid='id', "
+    "tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS lubimovka_employee_fts_ai "
+    "AFTER INSERT ON lubimovka_employee BEGIN "
+    "INSERT INTO lubimovka_employee_fts(rowid, search_document) "
+    "VALUES (new.id, new.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS lubimovka_employee_fts_ad "
+    "AFTER DELETE ON lubimovka_employee BEGIN "
+    "INSERT INTO lubimovka_employee_fts"
+    "(lubimovka_employee_fts, rowid, search_document) "
+    "VALUES ('delete', old.id, old.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS lubimovka_employee_fts_au "
+    "AFTER UPDATE OF search_document ON lubimovka_employee BEGIN "
+    "INSERT INTO lubimovka_employee_fts"
+    "(lubimovka_employee_fts, rowid, search_document) "
+    "VALUES ('delete', old.id, old.search_document); "
+    "INSERT INTO lubimovka_employee_fts(rowid, search_document) "
+    "VALUES (new.id, new.search_document); END",
+    "INSERT INTO lubimovka_employee_fts(lubimovka_employee_fts) "
+    "VALUES ('rebuild')",
+)
+
+POSTGRESQL_INDEX_SQL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS lubimovka_employee_search_trgm "
+    "ON lubimovka_employee USING gin (search_document gin_trgm_ops)",
+)
+
+
+def normalize_text(text):
+    return " ".join(str(text).lower().replace("ё", "е").split())
+
+
+def phone_digits(phone_number):
+    if not phone_number:
+        return None
+    if phone_number.is_valid():
+        text = phone_number.as_e164
+    else:
+        text = phone_number.raw_input or ""
+    return "".join(char for char in text if char.isdigit()) or None
+
+
+def fill_search_document(apps, schema_editor):
+    Employee = apps.get_model("lubimovka", "Employee")
+
+    def fill(employee):
+        words = [
+            normalize_text(value)
+            for value in (
+                employee.name,
+                employee.surname,
+                employee.patronymic,
+                employee.position,
+            )
+            if value
+        ]
+        phones = [
+            phone_digits(value)
+            for value in (
+                employee.work_phone_number,
+                employee.personal_phone_number,
+                employee.fax,
+            )
+        ]
+        employee.search_document = " ".join(
+            words + [phone for phone in phones if phone]
+        )
+
+    backfill(
+        Employee.objects.using(schema_editor.connection.alias),
+        ["search_document"],
+        fill,
+    )
+
+
+def run_statements(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        run_statements(connection, SQLITE_INDEX_SQL)
+    elif connection.vendor == "postgresql":
+        run_statements(connection, POSTGRESQL_INDEX_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        statements = [
+            f"DROP TRIGGER IF EXISTS lubimovka_employee_fts_{suffix}"
+            for suffix in ("ai", "ad", "au")
+        ]
+        statements.append("DROP TABLE IF EXISTS lubimovka_employee_fts")
+    elif connection.vendor == "postgresql":
+        statements = ["DROP INDEX IF EXISTS lubimovka_employee_search_trgm"]
+    else:
+        return
+    run_statements(connection, statements)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lubimovka', '0002_employee_personal_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Поисковый документ'),
+        ),
+        migrations.RunPython(fill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
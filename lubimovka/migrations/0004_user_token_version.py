@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lubimovka', '0003_employee_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Увеличивается при отзыве выданных пользователю токенов', verbose_name='Версия токенов'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:05
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from lubimovka.db import backfill
+
+
+def count_relations(relations, related_field):
+    return Coalesce(
+        Subquery(
+            relations.filter(
+                organization=OuterRef("pk"),
+                **{f"{related_field}__isnull": False},
+            )
+            .order_by()
+            .values("organization")
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Organization = apps.get_model("lubimovka", "Organization")
+    counters = {
+        "employee_count": count_relations(
+            apps.get_model(
+                "lubimovka", "OrganizationEmployeeRelation"
+            ).objects.using(alias),
+            "employee",
+        ),
+        "editor_count": count_relations(
+            apps.get_model(
+                "lubimovka", "OrganizationUserRelation"
+            ).objects.using(alias),
+            "user",
+        ),
+    }
+
+    def fill(organization):
+        for name in counters:
+            setattr(organization, name, getattr(organization, f"new_{name}"))
+
+    # Счётчики пачки организаций читаются тем же запросом, что и пачка.
+    backfill(
+        Organization.objects.using(alias)
+        .only("pk")
+        .annotate(
+            **{f"new_{name}": value for name, value in counters.items()}
+        ),
+        list(counters),
+        fill,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lubimovka', '0004_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='editor_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число редакторов'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='employee_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число сотрудников'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Обновляется и при изменении сотрудников и редакторов', verbose_name='Время изменения'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
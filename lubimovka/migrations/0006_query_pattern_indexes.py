@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lubimovka', '0005_organization_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(condition=models.Q(('creator__isnull', False)), fields=['creator', 'title'], name='lubimovka_org_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organizationemployeerelation',
+            index=models.Index(fields=['organization', 'employee'], include=('id',), name='lubimovka_org_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organizationuserrelation',
+            index=models.Index(fields=['organization', 'user'], name='lubimovka_org_user_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lubimovka', '0007_task'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['surname', 'id'], name='lubimovka_emp_surname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['position', 'id'], name='lubimovka_emp_position_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+import lubimovka.phones
+from lubimovka.db import backfill
+from lubimovka.phones import normalize_phone_number
+
+
+def fill_phone_normalized(apps, schema_editor):
+    Employee = apps.get_model("lubimovka", "Employee")
+
+    def fill(employee):
+        employee.work_phone_normalized = normalize_phone_number(
+            employee.work_phone_number
+        )
+        employee.fax_normalized = normalize_phone_number(employee.fax)
+
+    backfill(
+        Employee.objects.using(schema_editor.connection.alias),
+        ["work_phone_normalized", "fax_normalized"],
+        fill,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lubimovka', '0008_employee_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='fax_normalized',
+            field=models.CharField(db_index=True, editable=False, max_length=20, null=True, verbose_name='Факс (только цифры)'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='work_phone_normalized',
+            field=models.CharField(db_index=True, editable=False, max_length=20, null=True, verbose_name='Рабочий номер телефона (только цифры)'),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='fax',
+            field=lubimovka.phones.CachedPhoneNumberField(blank=True, max_length=128, region=None, verbose_name='Факс'),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='personal_phone_number',
+            field=lubimovka.phones.CachedPhoneNumberField(blank=True, max_length=128, region=None, verbose_name='Личный номер телефона'),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='work_phone_number',
+            field=lubimovka.phones.CachedPhoneNumberField(blank=True, max_length=128, region=None, verbose_name='Рабочий номер телефона'),
+        ),
+        migrations.RunPython(
+            fill_phone_normalized, migrations.RunPython.noop
+        ),
+    ]
@@ -1,8 +1,14 @@
-from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
-                                        PermissionsMixin)
+from django.contrib.auth.models import (
+    AbstractBaseUser,
+    BaseUserManager,
+    PermissionsMixin,
+)
 from django.core.exceptions import ValidationError
 from django.db import models
-from phonenumber_field import modelfields
+
+from .phones import CachedPhoneNumberField, normalize_phone_number
+from .provisioning import provision_users
+from .search import build_search_document
 
 
 class UserManager(BaseUserManager):
@@ -22,6 +28,10 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_superuser", False)
         return self._create_user(email, password, **extra_fields)
 
+    def bulk_create_users(self, rows, batch_size=1000, executor=None):
+        """Создаёт пользователей пачками, см. ``provision_users``."""
+        return provision_users(self, rows, batch_size, executor)
+
     def create_superuser(self, email, password, **extra_fields):
         extra_fields.setdefault("is_superuser", True)
 
@@ -37,6 +47,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Версия токенов",
+        help_text="Увеличивается при отзыве выданных пользователю токенов",
+    )
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
     objects = UserManager()
@@ -72,22 +88,68 @@ class Employee(models.Model):
         verbose_name="Должность",
         help_text="Не более 40 символов",
     )
-    work_phone_number = modelfields.PhoneNumberField(
+    work_phone_number = CachedPhoneNumberField(
         verbose_name="Рабочий номер телефона",
         blank=True,
     )
-    personal_phone_number = modelfields.PhoneNumberField(
+    personal_phone_number = CachedPhoneNumberField(
         verbose_name="Личный номер телефона",
         blank=True,
     )
-    fax = modelfields.PhoneNumberField(
+    fax = CachedPhoneNumberField(
         verbose_name="Факс",
         blank=True,
     )
+    personal_phone_normalized = models.CharField(
+        max_length=20,
+        unique=True,
+        null=True,
+        editable=False,
+        verbose_name="Личный номер телефона (только цифры)",
+    )
+    work_phone_normalized = models.CharField(
+        max_length=20,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Рабочий номер телефона (только цифры)",
+    )
+    fax_normalized = models.CharField(
+        max_length=20,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Факс (только цифры)",
+    )
+    search_document = models.TextField(
+        editable=False,
+        blank=True,
+        default="",
+        verbose_name="Поисковый документ",
+    )
+
+    computed_fields = (
+        "work_phone_normalized",
+        "personal_phone_normalized",
+        "fax_normalized",
+        "search_document",
+    )
 
     class Meta:
         verbose_name = "Сотрудник"
         verbose_name_plural = "Сотрудники"
+        indexes = [
+            # Фильтры по точному значению и началу строки и сортировка
+            # списка по фамилии и должности; id — порядок курсора.
+            models.Index(
+                fields=["surname", "id"],
+                name="lubimovka_emp_surname_idx",
+            ),
+            models.Index(
+                fields=["position", "id"],
+                name="lubimovka_emp_position_idx",
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -105,16 +167,52 @@ class Employee(models.Model):
             raise ValidationError(
                 "Необходимо указать хотя бы один номер телефона."
             )
+        personal_phone_normalized = normalize_phone_number(
+            self.personal_phone_number
+        )
         if (
-            Employee.objects.filter(
-                personal_phone_number=self.personal_phone_number
-            ).exists()
-            and self.personal_phone_number != ""
+            personal_phone_normalized is not None
+            and Employee.objects.filter(
+                personal_phone_normalized=personal_phone_normalized
+            )
+            .exclude(pk=self.pk)
+            .exists()
         ):
             raise ValidationError(
                 "Персональный номер телефона должен быть уникальным."
             )
 
+    @classmethod
+    def is_personal_phone_conflict(cls, error):
+        """Нарушена ли ошибкой ``IntegrityError`` уникальность личного
+        номера.
+
+        SQLite называет в тексте ошибки колонку, PostgreSQL — индекс,
+        имя которого начинается с имени колонки.
+        """
+        column = cls._meta.get_field("personal_phone_normalized").column
+        return column in str(error)
+
+    def fill_computed_fields(self):
+        self.work_phone_normalized = normalize_phone_number(
+            self.work_phone_number
+        )
+        self.personal_phone_normalized = normalize_phone_number(
+            self.personal_phone_number
+        )
+        self.fax_normalized = normalize_phone_number(self.fax)
+        self.search_document = build_search_document(self)
+
+    def save(self, *args, **kwargs):
+        self.fill_computed_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                *self.computed_fields,
+            }
+        super().save(*args, **kwargs)
+
 
 class Organization(models.Model):
     title = models.CharField(
@@ -145,23 +243,51 @@ class Organization(models.Model):
     access_to_edit = models.ManyToManyField(
         User, through="OrganizationUserRelation"
     )
+    employee_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Число сотрудников",
+    )
+    editor_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Число редакторов",
+    )
+    modified_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Время изменения",
+        help_text="Обновляется и при изменении сотрудников и редакторов",
+    )
 
-    def as_json(self):
-        list_email = []
-        for i in self.access_to_edit.all():
-            list_email.append(i.email)
+    def as_json(self, **extra):
+        """Организация и email всех её редакторов; ``extra`` дополняет
+        ответ."""
         return dict(
             id=self.id,
             title=self.title,
             address=self.address,
             description=self.description,
-            access_to_edit=list_email,
+            access_to_edit=list(
+                self.access_to_edit.order_by("email").values_list(
+                    "email", flat=True
+                )
+            ),
+            **extra,
         )
 
     class Meta:
         verbose_name = "Организация"
         verbose_name_plural = "Организации"
         ordering = ("title",)
+        indexes = [
+            # Организации создателя в порядке страниц списка; строки без
+            # создателя в индекс не попадают.
+            models.Index(
+                fields=["creator", "title"],
+                condition=models.Q(creator__isnull=False),
+                name="lubimovka_org_creator_idx",
+            ),
+        ]
 
 
 class OrganizationEmployeeRelation(models.Model):
@@ -183,6 +309,15 @@ class OrganizationEmployeeRelation(models.Model):
         verbose_name_plural = "Сотрудники в организации"
         unique_together = ("employee", "organization")
         ordering = ("employee",)
+        indexes = [
+            # Сотрудники организации по порядку: превью, счётчики и M2M.
+            # В PostgreSQL id в индексе позволяет не читать таблицу.
+            models.Index(
+                fields=["organization", "employee"],
+                include=["id"],
+                name="lubimovka_org_employee_idx",
+            ),
+        ]
 
 
 class OrganizationUserRelation(models.Model):
@@ -203,3 +338,72 @@ class OrganizationUserRelation(models.Model):
         verbose_name = "Пользователь с доступом к редактированию"
         verbose_name_plural = "Пользователи с доступом к редактированию"
         unique_together = ("user", "organization")
+        indexes = [
+            # Обратное направление к unique_together: редакторы
+            # организации, проверка роли и счётчики.
+            models.Index(
+                fields=["organization", "user"],
+                name="lubimovka_org_user_idx",
+            ),
+        ]
+
+
+class Task(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Ожидает"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField(max_length=100, verbose_name="Задача")
+    payload = models.JSONField(default=dict, verbose_name="Аргументы")
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name="Состояние",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток"
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=1, verbose_name="Максимум попыток"
+    )
+    run_after = models.DateTimeField(
+        verbose_name="Выполнить после",
+        help_text="Время следующей попытки",
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Занята до",
+        help_text="После этого времени задачу упавшего обработчика "
+        "забирает другой",
+    )
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Создана"
+    )
+    finished_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Завершена"
+    )
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            # Выборка очереди обработчиком: ожидающие и зависшие задачи,
+            # срок которых наступил.
+            models.Index(
+                fields=["status", "run_after"],
+                name="lubimovka_task_queue_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
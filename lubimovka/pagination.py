@@ -0,0 +1,130 @@
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """Условие «строка после позиции ``values``» для порядка ``ordering``.
+
+    Для ``(surname, id)`` это ``surname > s OR (surname = s AND id > i)``:
+    сравниваются все поля, а не только первое.
+    """
+    condition = Q()
+    equal = Q()
+    for order, value in zip(ordering, values):
+        name = order.lstrip("-")
+        lookup = "lt" if order.startswith("-") != reverse else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class CountableCursorPagination(CursorPagination):
+    """Keyset-пагинация: страница выбирается по условию на индексируемые
+    поля, без OFFSET, поэтому время не зависит от глубины.
+
+    Позиция курсора — значения всех полей сортировки, которая должна
+    заканчиваться уникальным полем. CursorPagination из DRF фильтрует
+    только по первому полю и пропускает строки с тем же значением через
+    OFFSET, ограниченный ``offset_cutoff``: на фамилии, которую носят
+    больше 1000 сотрудников, курсор зацикливался.
+
+    Общее количество записей по умолчанию возвращается в ``count``;
+    запрос ``?count=false`` отключает COUNT(*).
+    """
+
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if self.should_count(request):
+            self.count = queryset.count()
+        cursor = self.decode_cursor(request)
+        if self.keyset_position is not None:
+            ordering = self.get_ordering(request, queryset, view)
+            queryset = queryset.filter(
+                keyset_filter(
+                    ordering,
+                    self.decode_position(self.keyset_position, ordering),
+                    cursor.reverse,
+                )
+            )
+        page = super().paginate_queryset(queryset, request, view)
+        if page is not None and self.keyset_position is not None:
+            # Родительский класс позиции не видел: страница не первая.
+            if cursor.reverse:
+                self.has_next = True
+                self.next_position = self.keyset_position
+            else:
+                self.has_previous = True
+                self.previous_position = self.keyset_position
+            self.display_page_controls = self.template is not None
+        return page
+
+    def decode_cursor(self, request):
+        """Курсор без позиции: по ней уже отфильтровал
+        ``paginate_queryset``, а не родительский класс."""
+        cursor = super().decode_cursor(request)
+        self.keyset_position = cursor and cursor.position
+        if self.keyset_position is None:
+            return cursor
+        return cursor._replace(position=None)
+
+    def decode_position(self, position, ordering):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(instance[name])
+            else:
+                values.append(getattr(instance, name))
+        return json.dumps(values, default=str)
+
+    def should_count(self, request):
+        value = request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("false", "0", "no")
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"] = {
+            "count": {"type": "integer", "example": 123},
+            **response_schema["properties"],
+        }
+        return response_schema
+
+
+class OrganizationPagination(CountableCursorPagination):
+    ordering = ("title", "id")
+
+
+class EmployeePagination(CountableCursorPagination):
+    ordering = ("id",)
+
+
+class OrganizationSummaryPagination(CountableCursorPagination):
+    ordering = ("title", "id")
+    page_size = 1000
+    page_size_query_param = "page_size"
+    max_page_size = 5000
@@ -1,23 +1,141 @@
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import Http404
 from rest_framework import permissions
 
-from lubimovka.models import Organization
+from lubimovka.models import Organization, OrganizationUserRelation
+from lubimovka.routers import primary
+
+CREATOR = "creator"
+EDITOR = "editor"
+
+ROLE_CACHE_KEY = "organization-role:{organization_id}:{version}:{user_id}"
+ROLE_VERSION_CACHE_KEY = "organization-role-version:{organization_id}"
+
+
+def _role_cache_timeout():
+    return getattr(settings, "ORGANIZATION_ROLE_CACHE_TIMEOUT", 0)
+
+
+def _request_memo(request, name):
+    memo = getattr(request, name, None)
+    if memo is None:
+        memo = {}
+        setattr(request, name, memo)
+    return memo
+
+
+def _role_cache_key(organization_id, user_id):
+    version = cache.get(
+        ROLE_VERSION_CACHE_KEY.format(organization_id=organization_id)
+    )
+    return ROLE_CACHE_KEY.format(
+        organization_id=organization_id, version=version, user_id=user_id
+    )
+
+
+def invalidate_organization_roles(*organization_ids):
+    """Сбрасывает закэшированные роли пользователей в организациях.
+
+    Сброс выполняется после коммита: иначе параллельный запрос успел бы
+    закэшировать под новой версией роль из ещё не изменённой БД.
+    """
+    if not _role_cache_timeout() or not organization_ids:
+        return
+    transaction.on_commit(lambda: _bump_role_versions(organization_ids))
+
+
+def _bump_role_versions(organization_ids):
+    for organization_id in organization_ids:
+        key = ROLE_VERSION_CACHE_KEY.format(organization_id=organization_id)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+
+def _query_organization_role(request, organization):
+    user = request.user
+    if isinstance(organization, Organization):
+        if organization.creator_id == user.pk:
+            return CREATOR
+        is_editor = OrganizationUserRelation.objects.filter(
+            organization_id=organization.pk, user_id=user.pk
+        ).exists()
+        return EDITOR if is_editor else None
+    found = (
+        Organization.objects.filter(pk=organization)
+        .annotate(
+            is_editor=Exists(
+                OrganizationUserRelation.objects.filter(
+                    organization=OuterRef("pk"), user_id=user.pk
+                )
+            )
+        )
+        .first()
+    )
+    if found is None:
+        raise Http404
+    _request_memo(request, "_organizations")[found.pk] = found
+    if found.creator_id == user.pk:
+        return CREATOR
+    return EDITOR if found.is_editor else None
+
+
+def get_organization_role(request, organization):
+    """Роль пользователя запроса в организации: создатель, редактор или
+    ``None``.
+
+    ``organization`` — экземпляр или id; для несуществующего id
+    возбуждается Http404. Результат запоминается на время запроса и,
+    если задан ORGANIZATION_ROLE_CACHE_TIMEOUT, в общем кэше.
+    """
+    user = request.user
+    if not (user and user.is_authenticated):
+        return None
+    organization_id = getattr(organization, "pk", organization)
+    roles = _request_memo(request, "_organization_roles")
+    if organization_id in roles:
+        return roles[organization_id]
+    timeout = _role_cache_timeout()
+    if timeout:
+        key = _role_cache_key(organization_id, user.pk)
+        role = cache.get(key)
+        if role is not None:
+            roles[organization_id] = role or None
+            return role or None
+    # Роль проверяется по основной БД: реплика может ещё не знать о
+    # только что выданном доступе.
+    with primary():
+        role = _query_organization_role(request, organization)
+    roles[organization_id] = role
+    if timeout:
+        cache.set(key, role or "", timeout)
+    return role
+
+
+def get_request_organization(request, organization_id):
+    """Организация, уже загруженная при проверке прав, или запрос к БД."""
+    organizations = _request_memo(request, "_organizations")
+    if organization_id not in organizations:
+        organization = Organization.objects.filter(pk=organization_id).first()
+        if organization is None:
+            raise Http404
+        organizations[organization_id] = organization
+    return organizations[organization_id]
 
 
 class IsCreator(permissions.BasePermission):
     def has_permission(self, request, view):
-        organization = get_object_or_404(
-            Organization,
-            id=view.kwargs["organization_id"],
+        return (
+            get_organization_role(request, view.kwargs["organization_id"])
+            == CREATOR
         )
-        return organization.creator == request.user
 
 
 class IsCreatorOrUserAddToAccessToEdit(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        if request.user and request.user.is_authenticated:
-            if obj.creator == request.user:
-                return True
-            if request.user in obj.access_to_edit.all():
-                return True
-        return False
+        return get_organization_role(request, obj) in (CREATOR, EDITOR)
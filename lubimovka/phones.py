@@ -0,0 +1,157 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import CharField, ExpressionWrapper, F
+from django.utils.translation import gettext_lazy as _
+from phonenumber_field import modelfields
+from phonenumber_field.phonenumber import PhoneNumber, to_python
+
+# Разных номеров в справочнике немного больше, чем сотрудников на
+# странице; кэш ограничен, чтобы не расти от случайного ввода.
+PHONE_CACHE_SIZE = 4096
+
+# Поля PhoneNumber, от которых зависят проверка и форматирование.
+_NUMBER_FIELDS = (
+    "country_code",
+    "national_number",
+    "extension",
+    "italian_leading_zero",
+    "number_of_leading_zeros",
+    "raw_input",
+)
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _parse(value, region):
+    return to_python(value, region=region)
+
+
+def parse_phone_number(value, region=None):
+    """Строка в PhoneNumber, как ``to_python``, но с кэшем разбора.
+
+    Из кэша возвращается копия: PhoneNumber изменяемый, а экземпляры
+    моделей не должны делить один объект.
+    """
+    if not value or not isinstance(value, str):
+        return to_python(value, region=region)
+    phone_number = PhoneNumber()
+    phone_number.merge_from(
+        _parse(
+            value,
+            region or getattr(settings, "PHONENUMBER_DEFAULT_REGION", None),
+        )
+    )
+    return phone_number
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _formats(key):
+    """Номер во всех форматах или ``None``, если номер неверный."""
+    phone_number = PhoneNumber(**dict(zip(_NUMBER_FIELDS, key)))
+    if not phone_number.is_valid():
+        return None
+    return {
+        name: phone_number.format_as(number_format)
+        for name, number_format in PhoneNumber.format_map.items()
+    }
+
+
+def _number_formats(phone_number):
+    return _formats(
+        tuple(getattr(phone_number, name) for name in _NUMBER_FIELDS)
+    )
+
+
+def format_phone_number(phone_number, format_name=None):
+    """Номер в формате вывода (``PHONENUMBER_DEFAULT_FORMAT``), как
+    ``str(phone_number)``, но с кэшем; неверный номер — как введён."""
+    if not isinstance(phone_number, PhoneNumber):
+        return str(phone_number)
+    formats = _number_formats(phone_number)
+    if formats is None:
+        return phone_number.raw_input
+    return formats[
+        format_name or getattr(settings, "PHONENUMBER_DEFAULT_FORMAT", "E164")
+    ]
+
+
+def validate_phone_number(value):
+    """``validate_international_phonenumber`` с кэшем разбора."""
+    phone_number = parse_phone_number(value)
+    if (
+        isinstance(phone_number, PhoneNumber)
+        and _number_formats(phone_number) is None
+    ):
+        raise ValidationError(
+            _("The phone number entered is not valid."), code="invalid"
+        )
+
+
+def normalize_phone_number(phone_number):
+    """Приводит номер телефона к виду из одних цифр (E.164 без «+»).
+
+    Пустые значения превращаются в ``None``, чтобы уникальный индекс
+    не распространялся на сотрудников без номера.
+    """
+    if not phone_number:
+        return None
+    if not isinstance(phone_number, PhoneNumber):
+        phone_number = parse_phone_number(str(phone_number))
+    formats = _number_formats(phone_number)
+    text = phone_number.raw_input if formats is None else formats["E164"]
+    digits = "".join(char for char in text or "" if char.isdigit())
+    return digits or None
+
+
+class CachedPhoneNumberDescriptor(modelfields.PhoneNumberDescriptor):
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.name] = parse_phone_number(
+            value, region=self.field.region
+        )
+
+
+class CachedPhoneNumberField(modelfields.PhoneNumberField):
+    """PhoneNumberField, который разбирает и форматирует номера через
+    кэш: при чтении списков одни и те же номера не разбираются заново
+    для каждой строки."""
+
+    descriptor_class = CachedPhoneNumberDescriptor
+    default_validators = [validate_phone_number]
+
+    def get_prep_value(self, value):
+        if value:
+            if not isinstance(value, PhoneNumber):
+                value = parse_phone_number(value)
+            # Верный номер хранится в PHONENUMBER_DB_FORMAT, неверный —
+            # как введён.
+            value = format_phone_number(
+                value, getattr(settings, "PHONENUMBER_DB_FORMAT", "E164")
+            )
+        return CharField.get_prep_value(self, value)
+
+    def from_db_value(self, value, expression, connection):
+        return parse_phone_number(value)
+
+
+def stored_phone_number(field_path):
+    """Номер телефона из values() в том виде, в каком он хранится в БД
+    (строка E.164), без разбора в объект PhoneNumber."""
+    return ExpressionWrapper(F(field_path), output_field=CharField())
+
+
+def display_phone_number(stored):
+    """Номер телефона из БД в том виде, в каком его выводит сериализатор.
+
+    Если формат вывода совпадает с форматом хранения, сохранённая строка
+    возвращается как есть, без разбора номера.
+    """
+    if not stored or _displayed_as_stored():
+        return stored
+    return format_phone_number(_parse(stored, None))
+
+
+def _displayed_as_stored():
+    return getattr(settings, "PHONENUMBER_DEFAULT_FORMAT", "E164") == getattr(
+        settings, "PHONENUMBER_DB_FORMAT", "E164"
+    )
@@ -0,0 +1,255 @@
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger("lubimovka.profiling")
+
+DEFAULT_WINDOW = 500
+DEFAULT_DUPLICATE_THRESHOLD = 3
+REPORTED_DUPLICATES = 5
+
+_current_profile = ContextVar("lubimovka_profile", default=None)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class RequestProfile:
+    """Замеры одного запроса к API."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.signatures[sql] += 1
+
+    def duplicates(self, threshold):
+        """Запросы, повторённые не меньше ``threshold`` раз: признак N+1.
+
+        Параметры в SQL переданы отдельно, поэтому одинаковый текст
+        означает один и тот же запрос с разными значениями.
+        """
+        return {
+            sql: count
+            for sql, count in self.signatures.most_common()
+            if count >= threshold
+        }
+
+
+def _profiled_data(data):
+    def wrapper(serializer):
+        profile = _current_profile.get()
+        if profile is None:
+            return data.fget(serializer)
+        profile.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_time += time.perf_counter() - started
+
+    return property(wrapper)
+
+
+_patch_lock = threading.Lock()
+
+
+def instrument_serializers():
+    """Замеряет время сериализации через ``BaseSerializer.data``.
+
+    Обёртка ставится на класс, то есть на весь процесс, один раз при
+    создании ``QueryProfilingMiddleware`` и только при включённом
+    профилировании. Ставить её на время одного запроса нельзя: свойство
+    класса общее для потоков, и параллельные запросы снимали бы его друг
+    у друга. Замер ограничен запросами, которые прошли через middleware,
+    иначе: вне них профиля в ``_current_profile`` нет, и обёртка сразу
+    вызывает исходное свойство.
+    """
+    with _patch_lock:
+        if "_lubimovka_data" in vars(BaseSerializer):
+            return
+        BaseSerializer._lubimovka_data = BaseSerializer.data
+        BaseSerializer.data = _profiled_data(BaseSerializer.data)
+
+
+def uninstrument_serializers():
+    """Возвращает исходное ``BaseSerializer.data``."""
+    with _patch_lock:
+        if "_lubimovka_data" not in vars(BaseSerializer):
+            return
+        BaseSerializer.data = BaseSerializer._lubimovka_data
+        del BaseSerializer._lubimovka_data
+
+
+class ProfileAggregate:
+    """Скользящая статистика по маршрутам за последние ``window``
+    запросов к каждому из них."""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def add(self, route, sample):
+        with self._lock:
+            self._samples[route].append(sample)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = {
+                route: list(values) for route, values in self._samples.items()
+            }
+        return {
+            route: self.summarize(values)
+            for route, values in sorted(samples.items())
+        }
+
+    @staticmethod
+    def summarize(samples):
+        durations = [sample["duration_ms"] for sample in samples]
+        queries = [sample["queries"] for sample in samples]
+        return {
+            "requests": len(samples),
+            "p50_ms": round(percentile(durations, 0.5), 3),
+            "p95_ms": round(percentile(durations, 0.95), 3),
+            "avg_queries": round(sum(queries) / len(samples), 2),
+            "max_queries": max(queries),
+            "avg_db_ms": round(
+                sum(sample["db_ms"] for sample in samples) / len(samples), 3
+            ),
+            "avg_serializer_ms": round(
+                sum(sample["serializer_ms"] for sample in samples)
+                / len(samples),
+                3,
+            ),
+            "avg_response_bytes": round(
+                sum(sample["response_bytes"] or 0 for sample in samples)
+                / len(samples)
+            ),
+            "with_duplicates": sum(
+                1 for sample in samples if sample["duplicate_queries"]
+            ),
+        }
+
+
+aggregate = ProfileAggregate(
+    getattr(settings, "QUERY_PROFILING_WINDOW", DEFAULT_WINDOW)
+)
+
+
+def get_route(request):
+    match = request.resolver_match
+    if match is None:
+        return f"{request.method} <unresolved>"
+    # Маршруты DefaultRouter заданы регулярными выражениями.
+    route = match.route.replace("^", "").replace("$", "")
+    return f"{request.method} /{route}"
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+class QueryProfilingMiddleware:
+    """Считает запросы к БД, их время, повторы, время сериализации и
+    размер ответа для каждого запроса.
+
+    Включается настройкой ``QUERY_PROFILING``; без неё Django исключает
+    middleware из цепочки при старте и накладных расходов нет. Результат
+    попадает в заголовок ``Server-Timing``, в скользящую статистику
+    ``aggregate`` и в журнал ``lubimovka.profiling`` строкой JSON.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_threshold = getattr(
+            settings,
+            "QUERY_PROFILING_DUPLICATE_THRESHOLD",
+            DEFAULT_DUPLICATE_THRESHOLD,
+        )
+        instrument_serializers()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        profile.duration = time.perf_counter() - profile.started
+        self.record(request, response, profile)
+        return response
+
+    def record(self, request, response, profile):
+        duplicates = profile.duplicates(self.duplicate_threshold)
+        sample = {
+            "route": get_route(request),
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(profile.duration * 1000, 3),
+            "queries": profile.queries,
+            "db_ms": round(profile.db_time * 1000, 3),
+            "serializer_ms": round(profile.serializer_time * 1000, 3),
+            "response_bytes": response_size(response),
+            "duplicate_queries": sum(duplicates.values()),
+        }
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={sample["db_ms"]};desc="{profile.queries} queries"',
+                f'serializer;dur={sample["serializer_ms"]}',
+                f'total;dur={sample["duration_ms"]}',
+            )
+        )
+        aggregate.add(sample["route"], sample)
+        logger.info(
+            json.dumps(
+                {
+                    **sample,
+                    "duplicates": [
+                        {"sql": sql, "count": count}
+                        for sql, count in list(duplicates.items())[
+                            :REPORTED_DUPLICATES
+                        ]
+                    ],
+                },
+                ensure_ascii=False,
+            )
+        )
@@ -0,0 +1,195 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import repeat
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+HASH_CHUNK_SIZE = 25
+# Те же границы, что у пароля при регистрации.
+PASSWORD_MIN_LENGTH = 8
+PASSWORD_MAX_LENGTH = 128
+# Предел для API: пароли хэшируются в самом запросе, без пула, а один
+# хэш PBKDF2 занимает около 0,1 с. Большие списки создаёт команда
+# provision_users.
+WEB_PROVISION_MAX_USERS = 25
+
+
+def create_hashing_executor(workers=None):
+    """Пул процессов для хэширования паролей.
+
+    Процессы запускаются заново, а не через fork, и настраивают Django
+    из того же модуля настроек, поэтому хэшеры у них те же.
+    """
+    return ProcessPoolExecutor(
+        workers
+        or getattr(settings, "PASSWORD_HASHING_WORKERS", None)
+        or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+def hash_passwords(passwords, algorithm):
+    return [
+        make_password(password, hasher=algorithm) for password in passwords
+    ]
+
+
+def hash_all(passwords, executor=None):
+    """Хэширует пароли хэшером по умолчанию, частями в пуле ``executor``.
+
+    Без пула или для короткого списка хэширует в текущем процессе.
+    Алгоритм передаётся процессам явно, чтобы совпал с текущим даже при
+    переопределённых в рантайме настройках.
+    """
+    algorithm = get_hasher().algorithm
+    if executor is None or len(passwords) <= HASH_CHUNK_SIZE:
+        return hash_passwords(passwords, algorithm)
+    chunks = [
+        passwords[start : start + HASH_CHUNK_SIZE]
+        for start in range(0, len(passwords), HASH_CHUNK_SIZE)
+    ]
+    return [
+        encoded
+        for chunk in executor.map(hash_passwords, chunks, repeat(algorithm))
+        for encoded in chunk
+    ]
+
+
+@dataclass
+class ProvisionResult:
+    created: int = 0
+    existing: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def users_per_second(self):
+        return round(self.created / self.elapsed, 1) if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            **asdict(self),
+            "elapsed": round(self.elapsed, 3),
+            "users_per_second": self.users_per_second,
+        }
+
+
+def check_password(password, user):
+    """Проверки пароля при регистрации: длина и ``validate_password``."""
+    if not isinstance(password, str):
+        raise ValidationError("Пароль должен быть строкой.")
+    if not PASSWORD_MIN_LENGTH <= len(password) <= PASSWORD_MAX_LENGTH:
+        raise ValidationError(
+            f"Длина пароля от {PASSWORD_MIN_LENGTH} до "
+            f"{PASSWORD_MAX_LENGTH} символов."
+        )
+    validate_password(password, user)
+
+
+def insert_users(manager, users):
+    """Вставляет пользователей и возвращает адреса, которые параллельный
+    запрос создал после проверки: такие пропускаются, а не прерывают
+    создание ошибкой."""
+    taken = []
+    while users:
+        try:
+            with transaction.atomic(using=manager.db):
+                manager.bulk_create(users)
+            break
+        except IntegrityError:
+            existing = set(
+                manager.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", flat=True)
+            )
+            if not existing:
+                raise
+            taken.extend(
+                user.email for user in users if user.email in existing
+            )
+            users = [user for user in users if user.email not in existing]
+    return taken
+
+
+def provision_users(manager, rows, batch_size=1000, executor=None):
+    """Создаёт пользователей пачками.
+
+    ``rows`` — пары (номер строки, словарь с ``email`` и ``password``).
+    Email нормализуется как в ``create_user``, пароль проверяется как
+    при регистрации; повторы во входных данных и уже существующие адреса
+    пропускаются и попадают в отчёт. Пароли хэшируются хэшером по
+    умолчанию в пуле процессов ``executor``, если он задан. Возвращает
+    ``ProvisionResult``.
+    """
+    result = ProvisionResult()
+    started = time.perf_counter()
+    seen = set()
+    batch = []
+
+    def flush():
+        emails = [email for email, _ in batch]
+        existing = set(
+            manager.filter(email__in=emails).values_list("email", flat=True)
+        )
+        result.existing.extend(email for email in emails if email in existing)
+        new = [
+            (email, password)
+            for email, password in batch
+            if email not in existing
+        ]
+        hashed = hash_all([password for _, password in new], executor)
+        taken = insert_users(
+            manager,
+            [
+                manager.model(email=email, password=encoded)
+                for (email, _), encoded in zip(new, hashed)
+            ],
+        )
+        result.existing.extend(taken)
+        result.created += len(new) - len(taken)
+        batch.clear()
+
+    for number, row in rows:
+        email = password = None
+        try:
+            # Строку, которую не удалось прочитать, read_rows() передаёт
+            # исключением.
+            if isinstance(row, ValidationError):
+                raise row
+            email = row.get("email")
+            # Без пароля пользователь создаётся с непригодным паролем и
+            # задаёт свой через сброс.
+            password = row.get("password") or None
+            if not isinstance(email, str):
+                raise ValidationError("Укажите email.")
+            email = manager.normalize_email(email.strip())
+            validate_email(email)
+            if password is not None:
+                check_password(password, manager.model(email=email))
+        except ValidationError as error:
+            result.invalid.append(
+                {"row": number, "email": email, "errors": error.messages}
+            )
+            continue
+        if email in seen:
+            result.duplicates.append(email)
+            continue
+        seen.add(email)
+        batch.append((email, password))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    result.elapsed = time.perf_counter() - started
+    return result
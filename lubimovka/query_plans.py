@@ -0,0 +1,93 @@
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection
+
+from .benchmarks import default_scenarios, prepare, run_request
+
+SQLITE_FULL_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+POSTGRESQL_FULL_SCAN_RE = re.compile(r"Seq Scan on (\w+)")
+
+# Служебные таблицы Django, полный проход по которым ожидаем.
+IGNORED_TABLES = {"django_content_type", "django_migrations"}
+
+
+@dataclass
+class CapturedQueries:
+    statements: list = field(default_factory=list)
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+@dataclass
+class PlanProblem:
+    scenario: str
+    table: str
+    sql: str
+    plan: list
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Таблицы, которые план читает целиком, без индекса.
+
+    В SQLite это строки ``SCAN <таблица>`` без ``USING INDEX``, в
+    PostgreSQL — ``Seq Scan``.
+    """
+    pattern = (
+        SQLITE_FULL_SCAN_RE
+        if connection.vendor == "sqlite"
+        else POSTGRESQL_FULL_SCAN_RE
+    )
+    tables = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match and match.group(1) not in IGNORED_TABLES:
+            tables.append(match.group(1))
+    return tables
+
+
+def is_first_page(sql):
+    """Первая страница без фильтров: SQLite читает таблицу по порядку
+    первичного ключа и останавливается на LIMIT, план при этом тот же,
+    что у полного прохода."""
+    return " LIMIT " in sql and " WHERE " not in sql
+
+
+def check_query_plans(data, scenarios=None):
+    """Выполняет сценарии API и проверяет планы всех их SELECT."""
+    from rest_framework.test import APIClient
+
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(data.owner)
+    problems = []
+    checked = 0
+    if connection.vendor == "postgresql":
+        # На синтетических данных планировщик предпочтёт Seq Scan и при
+        # наличии индекса; без него Seq Scan значит, что индекса нет.
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+    for scenario in scenarios or default_scenarios(data):
+        prepare(scenario)
+        captured = CapturedQueries()
+        with connection.execute_wrapper(captured):
+            run_request(client, scenario)
+        for sql, params in captured.statements:
+            checked += 1
+            plan = explain(sql, params)
+            for table in full_scans(plan):
+                if connection.vendor == "sqlite" and is_first_page(sql):
+                    continue
+                problems.append(PlanProblem(scenario.name, table, sql, plan))
+    return checked, problems
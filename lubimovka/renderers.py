@@ -0,0 +1,89 @@
+from django.conf import settings
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from .phones import format_phone_number
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Строки, которые DRF экранирует в JSON, чтобы ответ можно было вставить
+# в <script>.
+LINE_SEPARATORS = (
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_default(obj):
+    """Типы, которых нет в orjson, кодируются так же, как в DRF.
+
+    datetime, date, time и UUID orjson кодирует сам, сюда они не
+    попадают.
+    """
+    if isinstance(obj, PhoneNumber):
+        return format_phone_number(obj)
+    return _encoder.default(obj)
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data):
+        return orjson.dumps(
+            data, default=encode_default, option=ORJSON_OPTIONS
+        )
+
+else:
+
+    def dumps(data):
+        return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с тем же выводом, что у ``JSONRenderer``.
+
+    Без orjson, а также для отступов по ``Accept: ...; indent=N`` и
+    настроек DRF, которые orjson не поддерживает, работает
+    стандартный рендерер.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        content = dumps(data)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+class FastJSONParser(JSONParser):
+    """JSON-парсер на orjson; тела не в UTF-8 разбирает стандартный."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            "encoding", settings.DEFAULT_CHARSET
+        )
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
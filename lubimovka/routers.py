@@ -0,0 +1,142 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_CACHE_KEY = "replica-pin:{user_id}"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_wrote = ContextVar("replica_wrote", default=False)
+_read_replica = ContextVar("replica_read", default=False)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def replica_may_lag(changed_at):
+    """Запрос читал из реплики, а данные менялись в ``changed_at``
+    (время Unix) — раньше, чем истекает ``REPLICA_PIN_TIMEOUT``, за
+    который реплика должна догнать основную БД."""
+    return _read_replica.get() and time.time() - changed_at < getattr(
+        settings, "REPLICA_PIN_TIMEOUT", 0
+    )
+
+
+def check_replica_cache(app_configs, **kwargs):
+    """Закрепление за основной БД хранится в кэше; кэш в памяти процесса
+    не видят другие процессы, и следующий запрос пользователя попадёт на
+    отстающую реплику."""
+    if (
+        get_replicas()
+        and getattr(settings, "REPLICA_PIN_TIMEOUT", 0)
+        and not getattr(settings, "CACHE_IS_SHARED", False)
+    ):
+        return [
+            checks.Error(
+                "Реплики БД требуют общего кэша: закрепление за основной "
+                "БД после записи хранится в кэше.",
+                hint="Укажите CACHE_BACKEND и CACHE_LOCATION общего кэша "
+                "(Redis, Memcached, БД).",
+                id="lubimovka.E001",
+            )
+        ]
+    return []
+
+
+@contextmanager
+def primary():
+    """Чтение внутри блока идёт в основную БД."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Направляет чтение в реплики ``DATABASE_REPLICAS``, запись — в
+    основную БД.
+
+    Реплики используются, только если их включил ``ReplicaReadMixin``
+    для текущего запроса; команды, сигналы вне запросов и миграции
+    работают с основной БД. После первой записи и внутри транзакций
+    основной БД чтение до конца запроса идёт туда же, чтобы не
+    прочитать устаревшие данные с отстающей реплики.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if (
+            not replicas
+            or not _replica_reads.get()
+            or _wrote.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        _read_replica.set(True)
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def _pin_key(user):
+    return PIN_CACHE_KEY.format(user_id=user.pk)
+
+
+def is_pinned(user):
+    """Пользователь недавно писал и читает из основной БД."""
+    return bool(user.is_authenticated and cache.get(_pin_key(user)))
+
+
+def pin(user):
+    timeout = getattr(settings, "REPLICA_PIN_TIMEOUT", 0)
+    if user.is_authenticated and timeout:
+        cache.set(_pin_key(user), True, timeout)
+
+
+class ReplicaReadMixin:
+    """Безопасные методы представления читают из реплик.
+
+    Аутентификация и проверка прав в ``initial()`` выполняются до
+    переключения и читают основную БД. Если запрос что-то записал,
+    пользователь на ``REPLICA_PIN_TIMEOUT`` секунд читает только из
+    основной БД: так он видит свои изменения, пока реплика догоняет.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        replica_token = _replica_reads.set(False)
+        wrote_token = _wrote.set(False)
+        read_token = _read_replica.set(False)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if _wrote.get():
+                pin(request.user)
+            return response
+        finally:
+            _replica_reads.reset(replica_token)
+            _wrote.reset(wrote_token)
+            _read_replica.reset(read_token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and get_replicas()
+            and not is_pinned(request.user)
+        ):
+            _replica_reads.set(True)
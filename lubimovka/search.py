@@ -0,0 +1,179 @@
+import re
+
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from .phones import normalize_phone_number
+
+SEARCH_INDEX_TABLE = "lubimovka_employee_fts"
+EMPLOYEE_TABLE = "lubimovka_employee"
+TRIGRAM_LENGTH = 3
+
+PHONE_QUERY_RE = re.compile(r"[\d\s()+\-]+")
+
+SQLITE_INDEX_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} USING fts5("
+    f"search_document, content='{EMPLOYEE_TABLE}', content_rowid='id', "
+    "tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_ai "
+    f"AFTER INSERT ON {EMPLOYEE_TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}(rowid, search_document) "
+    "VALUES (new.id, new.search_document); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_ad "
+    f"AFTER DELETE ON {EMPLOYEE_TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}"
+    f"({SEARCH_INDEX_TABLE}, rowid, search_document) "
+    "VALUES ('delete', old.id, old.search_document); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_au "
+    f"AFTER UPDATE OF search_document ON {EMPLOYEE_TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}"
+    f"({SEARCH_INDEX_TABLE}, rowid, search_document) "
+    "VALUES ('delete', old.id, old.search_document); "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}(rowid, search_document) "
+    "VALUES (new.id, new.search_document); END",
+)
+
+POSTGRESQL_INDEX_SQL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {EMPLOYEE_TABLE}_search_trgm "
+    f"ON {EMPLOYEE_TABLE} USING gin (search_document gin_trgm_ops)",
+)
+
+
+def normalize_search_text(text):
+    return " ".join(str(text).lower().replace("ё", "е").split())
+
+
+def build_search_document(employee):
+    """Строка, по которой ищется сотрудник: текст в нижнем регистре и
+    номера телефонов из одних цифр."""
+    words = [
+        normalize_search_text(value)
+        for value in (
+            employee.name,
+            employee.surname,
+            employee.patronymic,
+            employee.position,
+        )
+        if value
+    ]
+    phones = [
+        normalize_phone_number(value)
+        for value in (
+            employee.work_phone_number,
+            employee.personal_phone_number,
+            employee.fax,
+        )
+    ]
+    return " ".join(words + [phone for phone in phones if phone])
+
+
+def get_search_terms(search):
+    search = search.strip()
+    if PHONE_QUERY_RE.fullmatch(search) and any(
+        char.isdigit() for char in search
+    ):
+        return ["".join(char for char in search if char.isdigit())]
+    return normalize_search_text(search).split()
+
+
+def has_search_document(connection):
+    """Есть ли в БД колонка ``search_document``: после отката миграций
+    её может не быть, как и самой таблицы сотрудников."""
+    with connection.cursor() as cursor:
+        if EMPLOYEE_TABLE not in connection.introspection.table_names(cursor):
+            return False
+        return any(
+            column.name == "search_document"
+            for column in connection.introspection.get_table_description(
+                cursor, EMPLOYEE_TABLE
+            )
+        )
+
+
+def ensure_search_index(connection):
+    """Создаёт индекс полнотекстового поиска, если БД его поддерживает.
+
+    Операция идемпотентна: в SQLite пересоздание таблицы сотрудников
+    миграциями удаляет триггеры, поэтому она повторяется после migrate.
+    Пока миграция с ``search_document`` не применена, индекс не
+    создаётся: триггеры без колонки ломают вставку сотрудников.
+    """
+    if connection.vendor == "sqlite":
+        statements = SQLITE_INDEX_SQL
+    elif connection.vendor == "postgresql":
+        statements = POSTGRESQL_INDEX_SQL
+    else:
+        return
+    if not has_search_document(connection):
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def rebuild_search_index(connection):
+    if connection.vendor != "sqlite":
+        return
+    ensure_search_index(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}) "
+            "VALUES ('rebuild')"
+        )
+
+
+def search_employees(queryset, search, ranked=False):
+    """Фильтрует сотрудников по поисковой строке через индекс.
+
+    SQLite ищет по FTS5 с триграммным токенизатором, PostgreSQL — по
+    GIN-индексу pg_trgm. При ``ranked=True`` результат упорядочен по
+    релевантности, лучшие совпадения идут первыми.
+    """
+    terms = get_search_terms(search)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        return _search_sqlite(queryset, terms, ranked)
+    for term in terms:
+        queryset = queryset.filter(search_document__contains=term)
+    if ranked and vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        return queryset.annotate(
+            search_rank=TrigramSimilarity("search_document", " ".join(terms))
+        ).order_by("-search_rank", "id")
+    return queryset
+
+
+def _search_sqlite(queryset, terms, ranked):
+    index_terms = [term for term in terms if len(term) >= TRIGRAM_LENGTH]
+    for term in terms:
+        if len(term) < TRIGRAM_LENGTH:
+            queryset = queryset.filter(search_document__contains=term)
+    if not index_terms:
+        return queryset
+    match = " AND ".join(
+        '"{}"'.format(term.replace('"', '""')) for term in index_terms
+    )
+    indexed = RawSQL(
+        f"SELECT rowid FROM {SEARCH_INDEX_TABLE} "
+        f"WHERE {SEARCH_INDEX_TABLE} MATCH %s",
+        (match,),
+    )
+    queryset = queryset.filter(pk__in=indexed)
+    if ranked:
+        # Ранг считается только для найденных строк; условие на rowid
+        # FTS5 проверяет по спискам документов, не перебирая индекс.
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f"SELECT rank FROM {SEARCH_INDEX_TABLE} "
+                f"WHERE {SEARCH_INDEX_TABLE} MATCH %s "
+                f"AND rowid = {EMPLOYEE_TABLE}.id",
+                (match,),
+                output_field=FloatField(),
+            )
+        ).order_by("search_rank", "id")
+    return queryset
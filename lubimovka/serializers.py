@@ -1,18 +1,29 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Q, Subquery
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
-from .models import Employee, Organization
+from .importers import FILE_FORMATS, PERSONAL_PHONE_TAKEN
+from .models import Employee, Organization, OrganizationEmployeeRelation
+from .phones import (CachedPhoneNumberField, display_phone_number,
+                     format_phone_number, normalize_phone_number,
+                     stored_phone_number)
+from .provisioning import (PASSWORD_MAX_LENGTH, PASSWORD_MIN_LENGTH,
+                           WEB_PROVISION_MAX_USERS)
+from .search import search_employees
+from .sparse_fields import SparseFieldsSerializerMixin
 
-User = get_user_model
+User = get_user_model()
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
     """Сериализация регистрации пользователя и создания нового."""
 
     password = serializers.CharField(
-        max_length=128, min_length=8, write_only=True
+        max_length=PASSWORD_MAX_LENGTH,
+        min_length=PASSWORD_MIN_LENGTH,
+        write_only=True,
     )
 
     class Meta:
@@ -23,7 +34,23 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
-class EmployeesInOrganizationSerializer(serializers.ModelSerializer):
+class PhoneNumberField(serializers.CharField):
+    """Номер телефона; вывод форматируется через кэш ``phones``."""
+
+    def to_representation(self, value):
+        return format_phone_number(value)
+
+
+class EmployeeModelSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        CachedPhoneNumberField: PhoneNumberField,
+    }
+
+
+class EmployeesInOrganizationSerializer(EmployeeModelSerializer):
     class Meta:
         fields = (
             "id",
@@ -35,35 +62,54 @@ class EmployeesInOrganizationSerializer(serializers.ModelSerializer):
         model = Employee
 
 
-class EmployeesSerializer(serializers.ModelSerializer):
+class EmployeesSerializer(EmployeeModelSerializer):
+    personal_phone_unique_message = PERSONAL_PHONE_TAKEN
+
     class Meta:
-        fields = "__all__"
+        exclude = Employee.computed_fields
         model = Employee
 
+    def check_personal_phone_unique(self, personal_phone_number):
+        personal_phone_normalized = normalize_phone_number(
+            personal_phone_number
+        )
+        if personal_phone_normalized is None:
+            return
+        employees = Employee.objects.filter(
+            personal_phone_normalized=personal_phone_normalized
+        )
+        if self.instance is not None:
+            employees = employees.exclude(pk=self.instance.pk)
+        if employees.exists():
+            raise serializers.ValidationError(
+                self.personal_phone_unique_message
+            )
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as error:
+            if not Employee.is_personal_phone_conflict(error):
+                raise
+            raise serializers.ValidationError(
+                self.personal_phone_unique_message
+            )
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as error:
+            if not Employee.is_personal_phone_conflict(error):
+                raise
+            raise serializers.ValidationError(
+                self.personal_phone_unique_message
+            )
+
     def validate(self, data):
-        if "personal_phone_number" in self.context["request"].data:
-            if self.context["request"].method in ("POST",):
-                if self.context["request"].data["personal_phone_number"] in [
-                    employee.personal_phone_number
-                    for employee in Employee.objects.all()
-                ]:
-                    raise serializers.ValidationError(
-                        "Личный номера телефона должен быть уникальным."
-                    )
-            elif self.context["request"].method in ("PUT", "PATCH"):
-                if self.context["request"].data["personal_phone_number"] in [
-                    employee.personal_phone_number
-                    for employee in Employee.objects.filter(
-                        ~Q(
-                            id=self.context["request"].parser_context[
-                                "kwargs"
-                            ]["pk"]
-                        )
-                    )
-                ]:
-                    raise serializers.ValidationError(
-                        "Личный номера телефона должен быть уникальным."
-                    )
+        if "personal_phone_number" in data:
+            self.check_personal_phone_unique(data["personal_phone_number"])
         if self.context["request"].method in ("POST", "PUT"):
             fields = ["work_phone_number", "personal_phone_number", "fax"]
             for field in fields:
@@ -93,31 +139,154 @@ class EmployeesSerializer(serializers.ModelSerializer):
         return data
 
 
-class OrganizationGetSerializer(serializers.ModelSerializer):
+PHONE_FIELDS = ("work_phone_number", "personal_phone_number", "fax")
+
+
+def value_key(name):
+    return f"value_{name}"
+
+
+def employee_values(queryset, fields, prefix=""):
+    """Колонки сотрудника для values(): номера телефонов читаются
+    строками из БД, без объектов модели и PhoneNumber."""
+    return queryset.values(
+        **{
+            value_key(name): (
+                stored_phone_number(f"{prefix}{name}")
+                if name in PHONE_FIELDS
+                else F(f"{prefix}{name}")
+            )
+            for name in fields
+        }
+    )
+
+
+class EmployeeValuesSerializer(
+    SparseFieldsSerializerMixin, serializers.BaseSerializer
+):
+    """Быстрый сериализатор сотрудников только для чтения.
+
+    Принимает строки из ``get_values()`` и выводит те же поля в том же
+    порядке и виде, что и ``EmployeesSerializer``; при выборе полей —
+    только выбранные.
+    """
+
+    fields = (
+        "id",
+        "name",
+        "surname",
+        "patronymic",
+        "position",
+        *PHONE_FIELDS,
+    )
+
+    @classmethod
+    def get_available_fields(cls):
+        return list(cls.fields)
+
+    @classmethod
+    def get_values(cls, queryset, *ordering_fields, fields=None):
+        """Строки для сериализатора; ``fields`` ограничивает колонки
+        выбранными полями."""
+        if fields is None:
+            fields = cls.fields
+        # id и поля сортировки нужны без псевдонима: по ним строится
+        # курсор пагинации.
+        return employee_values(queryset, fields).values(
+            "id", *ordering_fields, *map(value_key, fields)
+        )
+
+    def to_representation(self, row):
+        fields = self.context.get("fields")
+        return {
+            name: (
+                display_phone_number(row[value_key(name)])
+                if name in PHONE_FIELDS
+                else row[value_key(name)]
+            )
+            for name in (self.fields if fields is None else fields)
+        }
+
+
+class EmployeeInOrganizationValuesSerializer(EmployeeValuesSerializer):
+    """Быстрый вариант ``EmployeesInOrganizationSerializer``."""
+
+    fields = ("id", "name", *PHONE_FIELDS)
+
+
+EMPLOYEES_PREVIEW_SIZE = 5
+
+
+def employees_preview(organization_ids, search=None):
+    """Первые сотрудники каждой организации одним запросом на страницу.
+
+    Коррелированный подзапрос находит id пятого сотрудника организации,
+    и выбираются связи не дальше него, поэтому число запросов не зависит
+    от размера страницы. LIMIT стоит в скалярном подзапросе, а не в
+    ``IN (...)``, который MySQL с LIMIT не выполняет.
+    Возвращает словарь id организации -> сериализованные сотрудники.
+    """
+    relations = OrganizationEmployeeRelation.objects.filter(
+        employee__isnull=False
+    )
+    if search is not None:
+        relations = relations.filter(
+            employee__in=search_employees(
+                Employee.objects.all(), search
+            ).values("pk")
+        )
+    last_employee = (
+        relations.filter(organization=OuterRef("organization"))
+        .order_by("employee")
+        .values("employee")[
+            EMPLOYEES_PREVIEW_SIZE - 1 : EMPLOYEES_PREVIEW_SIZE
+        ]
+    )
+    # Пара (организация, сотрудник) уникальна, поэтому связей до пятого
+    # сотрудника включительно не больше пяти.
+    relations = (
+        relations.filter(organization__in=organization_ids)
+        .annotate(last_employee=Subquery(last_employee))
+        .filter(
+            Q(last_employee__isnull=True) | Q(employee__lte=F("last_employee"))
+        )
+        .order_by("employee")
+    )
+    serializer = EmployeeInOrganizationValuesSerializer()
+    preview = {pk: [] for pk in organization_ids}
+    for row in employee_values(
+        relations,
+        EmployeeInOrganizationValuesSerializer.fields,
+        prefix="employee__",
+    ).values("organization_id", *map(value_key, serializer.fields)):
+        preview[row["organization_id"]].append(
+            serializer.to_representation(row)
+        )
+    return preview
+
+
+class OrganizationGetSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     employees = serializers.SerializerMethodField()
 
+    expandable_fields = ("employees",)
+
     class Meta:
         fields = ["id", "title", "employees"]
         model = Organization
 
     def get_employees(self, obj):
+        preview = self.context.get("employees_preview")
+        if preview is not None and obj.pk in preview:
+            return preview[obj.pk]
         request = self.context.get("request")
         search = request.query_params.get("search")
+        employees = obj.employees.all()
         if search is not None:
-            return EmployeesInOrganizationSerializer(
-                obj.employees.filter(
-                    Q(name__icontains=search)
-                    | Q(work_phone_number__icontains=search)
-                    | Q(fax__icontains=search)
-                    | Q(personal_phone_number__icontains=search)
-                    | Q(surname__icontains=search)
-                    | Q(patronymic__icontains=search)
-                    | Q(position__icontains=search)
-                ).distinct()[:5],
-                many=True,
-            ).data
+            employees = search_employees(employees, search)
         return EmployeesInOrganizationSerializer(
-            obj.employees.distinct()[:5],
+            employees.order_by("id").distinct()[:EMPLOYEES_PREVIEW_SIZE],
             many=True,
         ).data
 
@@ -136,5 +305,23 @@ class OrganizationSerializer(serializers.ModelSerializer):
         model = Organization
 
 
+class UserProvisionSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=WEB_PROVISION_MAX_USERS,
+        help_text=(
+            "Список объектов с полями email и password, не больше "
+            f"{WEB_PROVISION_MAX_USERS}"
+        ),
+    )
+
+
 class AccessToEditSerializer(serializers.Serializer):
     user = serializers.ListField(child=serializers.EmailField())
+
+
+class EmployeeImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=FILE_FORMATS, required=False)
+    organization = serializers.IntegerField(required=False)
@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from .authentication import TOKEN_FIELDS, forget_token_version
+from .cache import EMPLOYEES, touch, touch_employees, touch_organizations
+from .counters import refresh_counters
+from .permission import invalidate_organization_roles
+from .search import ensure_search_index
+
+
+def ensure_search_index_after_migrate(using, **kwargs):
+    ensure_search_index(connections[using])
+
+
+_pending_changes = ContextVar("pending_organization_changes", default=None)
+
+
+@contextmanager
+def batched_organization_changes():
+    """Изменения связей внутри блока обрабатываются после него, один раз
+    для каждой организации.
+
+    Удаление из QuerySet отправляет post_delete на каждую строку; без
+    блока каждая строка пересчитывала бы счётчики отдельным UPDATE.
+    Если блок завершился ошибкой, изменения не обрабатываются.
+    """
+    if _pending_changes.get() is not None:
+        yield
+        return
+    pending = {
+        organization_editors_changed: set(),
+        organization_employees_changed: set(),
+    }
+    token = _pending_changes.set(pending)
+    try:
+        yield
+    finally:
+        _pending_changes.reset(token)
+    for handler, organization_ids in pending.items():
+        if organization_ids:
+            handler(*organization_ids)
+
+
+def _postpone(handler, organization_ids):
+    pending = _pending_changes.get()
+    if pending is None:
+        return False
+    pending[handler].update(pk for pk in organization_ids if pk is not None)
+    return True
+
+
+def organization_access_changed(*organization_ids):
+    invalidate_organization_roles(*organization_ids)
+    touch_organizations(*organization_ids)
+
+
+def organization_editors_changed(*organization_ids):
+    if _postpone(organization_editors_changed, organization_ids):
+        return
+    organization_access_changed(*organization_ids)
+    refresh_counters(*organization_ids)
+
+
+def organization_employees_changed(*organization_ids):
+    if _postpone(organization_employees_changed, organization_ids):
+        return
+    touch(EMPLOYEES)
+    touch_organizations(*organization_ids)
+    refresh_counters(*organization_ids)
+
+
+def changed_organization_ids(
+    sender, instance, action, reverse, pk_set, reverse_field
+):
+    """id организаций, затронутых изменением M2M-связи.
+
+    Для итоговых событий возвращает список, для остальных — ``None``.
+    При очистке связи со стороны сотрудника или пользователя затронутые
+    организации запоминаются до удаления строк.
+    """
+    if not reverse:
+        return [instance.pk] if action.startswith("post_") else None
+    attribute = f"_cleared_{sender._meta.model_name}_ids"
+    if action == "pre_clear":
+        setattr(
+            instance,
+            attribute,
+            list(
+                sender.objects.filter(**{reverse_field: instance}).values_list(
+                    "organization_id", flat=True
+                )
+            ),
+        )
+    elif action == "post_clear":
+        return getattr(instance, attribute, [])
+    elif action in ("post_add", "post_remove"):
+        return list(pk_set)
+    return None
+
+
+def on_organization_change(sender, instance, **kwargs):
+    organization_access_changed(instance.pk)
+
+
+def on_employee_change(sender, instance, **kwargs):
+    touch_employees(instance.pk)
+
+
+def on_user_relation_change(sender, instance, **kwargs):
+    if instance.organization_id is not None:
+        organization_editors_changed(instance.organization_id)
+
+
+def on_employee_relation_change(sender, instance, **kwargs):
+    if instance.organization_id is not None:
+        organization_employees_changed(instance.organization_id)
+
+
+def on_access_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    organization_ids = changed_organization_ids(
+        sender, instance, action, reverse, pk_set, "user"
+    )
+    if organization_ids is not None:
+        organization_editors_changed(*organization_ids)
+
+
+def on_employees_m2m_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    organization_ids = changed_organization_ids(
+        sender, instance, action, reverse, pk_set, "employee"
+    )
+    if organization_ids is not None:
+        organization_employees_changed(*organization_ids)
+
+
+def remember_organizations(relation_model, field_name):
+    """Обработчик pre_delete: запоминает организации удаляемого объекта.
+
+    Связи при удалении обнуляются без сигналов, поэтому счётчики
+    пересчитываются в post_delete по запомненным id.
+    """
+
+    def handler(sender, instance, **kwargs):
+        instance._counter_organization_ids = list(
+            relation_model.objects.filter(
+                **{field_name: instance}
+            ).values_list("organization_id", flat=True)
+        )
+
+    return handler
+
+
+def refresh_remembered_counters(sender, instance, **kwargs):
+    refresh_counters(*getattr(instance, "_counter_organization_ids", ()))
+
+
+def on_user_pre_save(sender, instance, raw, update_fields, **kwargs):
+    """Отзывает токены, если изменились данные, записанные в них."""
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        TOKEN_FIELDS
+    ):
+        return
+    saved = sender.objects.filter(pk=instance.pk).values(*TOKEN_FIELDS).first()
+    if saved is None:
+        return
+    if any(saved[name] != getattr(instance, name) for name in TOKEN_FIELDS):
+        instance.token_version += 1
+        if update_fields is not None and "token_version" not in update_fields:
+            sender.objects.filter(pk=instance.pk).update(
+                token_version=instance.token_version
+            )
+
+
+def on_user_change(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
@@ -0,0 +1,121 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_field_list(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsSerializerMixin:
+    """Выводит только поля, выбранные параметрами ``?fields=`` и
+    ``?expand=``.
+
+    ``fields`` перечисляет поля ответа, ``expand`` — вложенные блоки из
+    ``expandable_fields``. Без обоих параметров ответ прежний, вложенные
+    блоки включены; ``?expand=`` без значения отключает их. Выбор
+    передаётся сериализатору в ``context["fields"]``.
+    """
+
+    expandable_fields = ()
+
+    @classmethod
+    def get_available_fields(cls):
+        return list(cls().get_fields())
+
+    @classmethod
+    def get_selected_fields(cls, request):
+        """Выбранные поля в порядке объявления или ``None``, если ответ
+        полный."""
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        fields = request.query_params.get(FIELDS_PARAM)
+        expand = request.query_params.get(EXPAND_PARAM)
+        if fields is None and expand is None:
+            return None
+        available = cls.get_available_fields()
+        if fields is None:
+            selected = [
+                name for name in available if name not in cls.expandable_fields
+            ]
+        else:
+            selected = parse_field_list(fields)
+            unknown = set(selected) - set(available)
+            if unknown:
+                raise ValidationError(
+                    {
+                        FIELDS_PARAM: "Неизвестные поля: "
+                        + ", ".join(sorted(unknown))
+                    }
+                )
+        expanded = parse_field_list(expand or "")
+        unknown = set(expanded) - set(cls.expandable_fields)
+        if unknown:
+            raise ValidationError(
+                {
+                    EXPAND_PARAM: "Нельзя раскрыть: "
+                    + ", ".join(sorted(unknown))
+                }
+            )
+        selected = {*selected, *expanded}
+        return [name for name in available if name in selected]
+
+    @classmethod
+    def get_columns(cls, selected):
+        """Колонки модели для ``.only()``, нужные выбранным полям."""
+        fields = cls().get_fields()
+        model_fields = {
+            field.name for field in cls.Meta.model._meta.concrete_fields
+        }
+        # У несвязанного поля source задан, только если указан явно.
+        sources = [
+            fields[name].source or name
+            for name in (fields if selected is None else selected)
+        ]
+        return [source for source in sources if source in model_fields]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get("fields")
+        if selected is None:
+            return fields
+        return type(fields)(
+            (name, field) for name, field in fields.items() if name in selected
+        )
+
+
+class SparseFieldsViewMixin:
+    """Передаёт выбор полей сериализатору и ограничивает колонки
+    запроса.
+
+    ``only_columns()`` дополняет колонки сериализатора
+    ``required_columns`` — теми, что нужны пагинации и проверке прав.
+    """
+
+    required_columns = ("id",)
+
+    def get_selected_fields(self):
+        if not hasattr(self, "_selected_fields"):
+            serializer_class = self.get_serializer_class()
+            self._selected_fields = (
+                serializer_class.get_selected_fields(self.request)
+                if issubclass(serializer_class, SparseFieldsSerializerMixin)
+                else None
+            )
+        return self._selected_fields
+
+    def only_columns(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if self.request.method not in SAFE_METHODS or not issubclass(
+            serializer_class, SparseFieldsSerializerMixin
+        ):
+            return queryset
+        columns = serializer_class.get_columns(self.get_selected_fields())
+        return queryset.only(*self.required_columns, *columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_selected_fields()
+        return context
@@ -0,0 +1,247 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import close_old_connections, connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Employee, Organization, Task, User
+from .search import rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 30
+DEFAULT_LEASE = 600
+REFRESH_BATCH_SIZE = 1000
+
+TASKS = {}
+
+
+def task(name=None, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу.
+
+    Аргументы задачи хранятся в JSON, поэтому функция должна принимать
+    только именованные аргументы простых типов.
+    """
+
+    def register(func):
+        func.task_name = name or func.__name__
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+
+    return register
+
+
+def enqueue(func, delay=0, **payload):
+    """Ставит задачу в очередь и возвращает её запись.
+
+    Строка добавляется в текущей транзакции: если запрос откатится,
+    задача не выполнится, а обработчик увидит её только после коммита.
+    """
+    max_attempts = func.max_attempts or getattr(
+        settings, "TASK_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS
+    )
+    return Task.objects.create(
+        name=func.task_name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед повтором: 30 с, 1 мин, 2 мин, ..."""
+    delay = getattr(settings, "TASK_RETRY_DELAY", DEFAULT_RETRY_DELAY)
+    return timedelta(seconds=delay * 2 ** (attempts - 1))
+
+
+def task_lease():
+    return timedelta(seconds=getattr(settings, "TASK_LEASE", DEFAULT_LEASE))
+
+
+def fail_expired_tasks(now=None):
+    """Завершает ошибкой задачи с истёкшим захватом, у которых не
+    осталось попыток: обработчик падал на них ``max_attempts`` раз.
+
+    Возвращает число таких задач.
+    """
+    now = now or timezone.now()
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        locked_until__lte=now,
+        attempts__gte=F("max_attempts"),
+    ).update(
+        status=Task.FAILED,
+        locked_until=None,
+        last_error="Обработчик не завершил задачу за отведённое время.",
+        finished_at=now,
+    )
+
+
+def claim_tasks(limit):
+    """Забирает до ``limit`` задач, срок которых наступил.
+
+    Каждая задача захватывается условным UPDATE, поэтому несколько
+    обработчиков не выполнят её дважды. Задачи упавшего обработчика
+    снова доступны после ``locked_until``, пока у них остаются попытки.
+    """
+    now = timezone.now()
+    fail_expired_tasks(now)
+    available = Q(status=Task.PENDING, run_after__lte=now) | Q(
+        status=Task.RUNNING,
+        locked_until__lte=now,
+        attempts__lt=F("max_attempts"),
+    )
+    claimed = []
+    candidates = Task.objects.filter(available).order_by("run_after", "id")
+    for pk in candidates.values_list("pk", flat=True)[:limit]:
+        if (
+            Task.objects.filter(available, pk=pk).update(
+                status=Task.RUNNING,
+                attempts=F("attempts") + 1,
+                locked_until=now + task_lease(),
+            )
+            == 1
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def extend_leases(task_ids):
+    """Продлевает захват выполняемых задач ещё на ``TASK_LEASE``.
+
+    Обработчик вызывает её, пока задачи выполняются, чтобы долгую
+    задачу не забрал другой обработчик. Возвращает число продлённых.
+    """
+    if not task_ids:
+        return 0
+    return Task.objects.filter(pk__in=task_ids, status=Task.RUNNING).update(
+        locked_until=timezone.now() + task_lease()
+    )
+
+
+def execute_task(task_id):
+    """Выполняет захваченную задачу и записывает результат.
+
+    Вызывается в потоке или процессе пула обработчика, поэтому сам
+    закрывает устаревшие соединения с БД, как это делает обработчик
+    запросов.
+    """
+    close_old_connections()
+    try:
+        task_record = Task.objects.get(pk=task_id)
+        func = TASKS.get(task_record.name)
+        try:
+            if func is None:
+                raise LookupError(
+                    f"Задача {task_record.name!r} не зарегистрирована."
+                )
+            func(**task_record.payload)
+        except Exception:
+            error = traceback.format_exc()
+            logger.exception("Задача %s завершилась с ошибкой", task_record)
+            if func is not None and (
+                task_record.attempts < task_record.max_attempts
+            ):
+                Task.objects.filter(pk=task_id).update(
+                    status=Task.PENDING,
+                    run_after=timezone.now()
+                    + retry_delay(task_record.attempts),
+                    locked_until=None,
+                    last_error=error,
+                )
+                return Task.PENDING
+            Task.objects.filter(pk=task_id).update(
+                status=Task.FAILED,
+                locked_until=None,
+                last_error=error,
+                finished_at=timezone.now(),
+            )
+            return Task.FAILED
+        Task.objects.filter(pk=task_id).update(
+            status=Task.DONE, locked_until=None, finished_at=timezone.now()
+        )
+        return Task.DONE
+    finally:
+        close_old_connections()
+
+
+def purge_finished_tasks(older_than):
+    """Удаляет выполненные задачи старше ``older_than``."""
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE, finished_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
+
+
+def refresh_employee_fields(employees, fields, batch_size=REFRESH_BATCH_SIZE):
+    """Пересчитывает вычисляемые поля сотрудников пачками по id.
+
+    Возвращает число сотрудников, у которых поля изменились.
+    """
+    database = employees.db
+    employees = employees.order_by("id")
+    last_id = 0
+    updated = 0
+    while True:
+        batch = list(employees.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return updated
+        changed = []
+        for employee in batch:
+            saved = [getattr(employee, name) for name in fields]
+            employee.fill_computed_fields()
+            if saved != [getattr(employee, name) for name in fields]:
+                changed.append(employee)
+        Employee.objects.using(database).bulk_update(changed, fields)
+        updated += len(changed)
+        last_id = batch[-1].id
+
+
+@task()
+def send_access_granted_email(organization_id, user_ids):
+    """Письма пользователям, получившим доступ к редактированию."""
+    organization = Organization.objects.filter(pk=organization_id).first()
+    if organization is None:
+        return
+    emails = User.objects.filter(pk__in=user_ids, is_active=True).values_list(
+        "email", flat=True
+    )
+    subject = f"Доступ к организации «{organization.title}»"
+    message = (
+        f"Вам открыт доступ к редактированию организации "
+        f"«{organization.title}»."
+    )
+    send_mass_mail(
+        [
+            (subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+            for email in emails
+        ]
+    )
+
+
+@task()
+def normalize_phone_numbers(employee_ids=None):
+    """Пересчитывает нормализованные номера телефонов сотрудников.
+
+    Без ``employee_ids`` обрабатываются все сотрудники.
+    """
+    employees = Employee.objects.all()
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    return refresh_employee_fields(employees, list(Employee.computed_fields))
+
+
+@task(max_attempts=2)
+def reindex_search(database="default"):
+    """Пересчитывает поисковые документы и перестраивает индекс."""
+    updated = refresh_employee_fields(
+        Employee.objects.using(database), ["search_document"]
+    )
+    rebuild_search_index(connections[database])
+    return updated
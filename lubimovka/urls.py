@@ -1,8 +1,15 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import (TokenObtainPairView,
+                                            TokenRefreshView)
 
+from lubimovka import async_views
+from lubimovka.authentication import (ClaimsTokenObtainPairSerializer,
+                                      VersionedTokenRefreshSerializer)
 from lubimovka.views import (AccessToEditView, EmployeeViewSet,
-                             OrganizationViewSet, RegistrationAPIView)
+                             OrganizationViewSet, ProfilingView,
+                             RegistrationAPIView, TokenRevokeView,
+                             UserProvisionView)
 
 router = DefaultRouter()
 
@@ -20,13 +27,40 @@ router.register(
 
 extra_patterns = [
     path("auth/users/", RegistrationAPIView.as_view()),
+    path("auth/users/bulk/", UserProvisionView.as_view()),
+    path(
+        "auth/token/",
+        TokenObtainPairView.as_view(
+            serializer_class=ClaimsTokenObtainPairSerializer
+        ),
+    ),
+    path(
+        "auth/token/refresh/",
+        TokenRefreshView.as_view(
+            serializer_class=VersionedTokenRefreshSerializer
+        ),
+    ),
+    path("auth/token/revoke/", TokenRevokeView.as_view()),
     path("", include(router.urls)),
     path(
         "organizations/<int:organization_id>/access_to_edit/",
         AccessToEditView.as_view(),
     ),
+    path("profiling/", ProfilingView.as_view()),
+]
+
+async_patterns = [
+    path("organizations/", async_views.organization_list),
+    path("organizations/<int:pk>/", async_views.organization_detail),
+    path(
+        "organizations/<int:organization_id>/access_to_edit/",
+        async_views.access_to_edit_list,
+    ),
+    path("employees/", async_views.employee_list),
+    path("employees/<int:pk>/", async_views.employee_detail),
 ]
 
 urlpatterns = [
     path("v1/", include(extra_patterns)),
+    path("v1/async/", include(async_patterns)),
 ]
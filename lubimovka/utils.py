@@ -1,8 +1,10 @@
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import add_claims
+
 
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = add_claims(RefreshToken.for_user(user), user)
 
     return {
         "access": str(refresh.access_token),
@@ -1,20 +1,62 @@
+import codecs
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Q
-from django.http import JsonResponse
-from django.shortcuts import get_list_or_404, get_object_or_404
+from django.http import StreamingHttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from .authentication import revoke_tokens
+from .batch import BatchRetrieveMixin
+from .cache import (
+    EMPLOYEES,
+    ORGANIZATIONS,
+    CachedResponseMixin,
+    employee_scope,
+    organization_scope,
+)
+from .exporters import CONTENT_TYPES, EXPORTERS, export_rows
+from .filters import EmployeeFilter, StableOrderingFilter
+from .importers import JSONL, guess_file_format, import_employees
 from .models import Employee, Organization, OrganizationUserRelation
-from .permission import IsCreator, IsCreatorOrUserAddToAccessToEdit
-from .serializers import (AccessToEditSerializer, EmployeesSerializer,
-                          OrganizationGetSerializer, OrganizationSerializer,
-                          RegistrationSerializer)
+from .pagination import (
+    EmployeePagination,
+    OrganizationPagination,
+    OrganizationSummaryPagination,
+)
+from .permission import (
+    IsCreator,
+    IsCreatorOrUserAddToAccessToEdit,
+    get_organization_role,
+    get_request_organization,
+)
+from .profiling import aggregate
+from .routers import ReplicaReadMixin
+from .search import search_employees
+from .serializers import (
+    AccessToEditSerializer,
+    EmployeeImportSerializer,
+    EmployeesSerializer,
+    EmployeeValuesSerializer,
+    OrganizationGetSerializer,
+    OrganizationSerializer,
+    RegistrationSerializer,
+    UserProvisionSerializer,
+    employees_preview,
+)
+from .signals import batched_organization_changes, organization_editors_changed
+from .sparse_fields import SparseFieldsViewMixin
+from .tasks import enqueue, send_access_granted_email
 
 User = get_user_model()
 
@@ -33,49 +75,248 @@ class RegistrationAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class OrganizationViewSet(ModelViewSet):
+class OrganizationViewSet(
+    BatchRetrieveMixin,
+    SparseFieldsViewMixin,
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ModelViewSet,
+):
     serializer_class = OrganizationGetSerializer
     permission_classes = [IsCreatorOrUserAddToAccessToEdit]
+    pagination_class = OrganizationPagination
     queryset = Organization.objects.all()
+    # Название — позиция курсора, создатель — проверка прав.
+    required_columns = ("id", "title", "creator")
+    # Действия, которые выводят организации с превью сотрудников; batch
+    # принимает и POST.
+    read_actions = ("list", "retrieve", "batch")
 
-    def get_queryset(self):
+    def get_visible_queryset(self):
         user = self.request.user
-        result = self.queryset.filter(
-            Q(access_to_edit=user) | Q(creator=user)
-        ).distinct()
-        return result
+        return self.queryset.filter(
+            Q(creator=user)
+            | Q(
+                pk__in=OrganizationUserRelation.objects.filter(
+                    user=user
+                ).values("organization")
+            )
+        )
+
+    def get_queryset(self):
+        return self.only_columns(self.get_visible_queryset())
+
+    def get_serializer(self, *args, **kwargs):
+        selected = self.get_selected_fields()
+        if (
+            self.action in self.read_actions
+            and args
+            and (selected is None or "employees" in selected)
+        ):
+            organizations = args[0] if kwargs.get("many") else [args[0]]
+            context = kwargs.setdefault(
+                "context", self.get_serializer_context()
+            )
+            context["employees_preview"] = employees_preview(
+                [organization.pk for organization in organizations],
+                self.request.query_params.get("search"),
+            )
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
-        if self.request.method == "GET":
+        if self.action in self.read_actions:
             return OrganizationGetSerializer
         else:
             return OrganizationSerializer
 
+    def get_list_cache_scopes(self):
+        return [ORGANIZATIONS, EMPLOYEES]
+
+    def get_detail_cache_scopes(self):
+        return [organization_scope(self.kwargs["pk"]), EMPLOYEES]
+
     def perform_create(self, serializer):
         user = self.request.user
         serializer.save(creator=user)
 
+    def perform_destroy(self, instance):
+        # Связи удаляются каскадом, каждая со своим post_delete.
+        with transaction.atomic(), batched_organization_changes():
+            instance.delete()
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def summary(self, request):
+        """Организации с числом сотрудников и редакторов.
 
-class EmployeeViewSet(ModelViewSet):
+        Счётчики хранятся в строке организации, поэтому страница до
+        тысяч записей читается одним проходом по индексу названия, без
+        подсчёта по таблицам связей.
+        """
+        return self.cached_response(
+            self.get_list_cache_scopes(), self.summary_response
+        )
+
+    def summary_response(self, request):
+        organizations = self.get_visible_queryset().values(
+            "id", "title", "employee_count", "editor_count", "modified_at"
+        )
+        paginator = OrganizationSummaryPagination()
+        page = paginator.paginate_queryset(organizations, request, view=self)
+        return paginator.get_paginated_response(page)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "file_format",
+                openapi.IN_QUERY,
+                description="Формат выгрузки: jsonl (по умолчанию) или csv",
+                type=openapi.TYPE_STRING,
+                enum=list(EXPORTERS),
+            ),
+            openapi.Parameter(
+                "organization",
+                openapi.IN_QUERY,
+                description="id организации, если нужна только одна",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ]
+    )
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def export(self, request):
+        file_format = request.query_params.get("file_format", JSONL)
+        if file_format not in EXPORTERS:
+            choices = ", ".join(EXPORTERS)
+            raise ValidationError(
+                {"file_format": f"Допустимые значения: {choices}."}
+            )
+        organizations = self.get_visible_queryset()
+        organization_id = request.query_params.get("organization")
+        if organization_id is not None:
+            if not organization_id.isdigit():
+                raise ValidationError({"organization": "Укажите id."})
+            organizations = organizations.filter(pk=organization_id)
+        response = StreamingHttpResponse(
+            EXPORTERS[file_format](export_rows(organizations)),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="organizations.{file_format}"'
+        )
+        return response
+
+
+class EmployeeViewSet(
+    BatchRetrieveMixin,
+    SparseFieldsViewMixin,
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ModelViewSet,
+):
     serializer_class = EmployeesSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = EmployeePagination
     queryset = Employee.objects.all()
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
+    filterset_class = EmployeeFilter
+    ordering_fields = ("id", "surname", "position")
+    ordering = ("id",)
+    search_limit = 10
+    max_search_limit = 100
+    # Действия, которые читают строки values() вместо объектов модели.
+    values_actions = ("list", "batch")
+
+    def get_queryset(self):
+        if self.action in self.values_actions:
+            return EmployeeValuesSerializer.get_values(
+                self.queryset,
+                "surname",
+                "position",
+                fields=self.get_selected_fields(),
+            )
+        return self.only_columns(super().get_queryset())
+
+    def get_serializer_class(self):
+        if self.action in self.values_actions and not getattr(
+            self, "swagger_fake_view", False
+        ):
+            return EmployeeValuesSerializer
+        return super().get_serializer_class()
+
+    def get_list_cache_scopes(self):
+        return [EMPLOYEES]
+
+    def get_detail_cache_scopes(self):
+        return [employee_scope(self.kwargs["pk"])]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "search",
+                openapi.IN_QUERY,
+                description="Имя, фамилия, должность или номер телефона",
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                description="Количество результатов, не более 100",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ]
+    )
+    @action(detail=False)
+    def search(self, request):
+        search = request.query_params.get("search", "")
+        try:
+            limit = int(request.query_params.get("limit", self.search_limit))
+        except ValueError:
+            raise ValidationError({"limit": "Укажите целое число."})
+        limit = max(1, min(limit, self.max_search_limit))
+        employees = search_employees(self.get_queryset(), search, ranked=True)[
+            :limit
+        ]
+        serializer = self.get_serializer(employees, many=True)
+        return Response(serializer.data)
+
+    @swagger_auto_schema(request_body=EmployeeImportSerializer)
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+    )
+    def import_employees(self, request):
+        serializer = EmployeeImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        file_format = serializer.validated_data.get(
+            "file_format", guess_file_format(upload.name)
+        )
+        organization = None
+        organization_id = serializer.validated_data.get("organization")
+        if organization_id is not None:
+            role = get_organization_role(request, organization_id)
+            if role is None:
+                raise PermissionDenied
+            organization = get_request_organization(request, organization_id)
+        result = import_employees(
+            codecs.iterdecode(upload, "utf-8-sig"),
+            file_format,
+            organization=organization,
+        )
+        return Response(result)
 
 
-class AccessToEditView(APIView):
+class AccessToEditView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated, IsCreator]
     serializer_class = AccessToEditSerializer
 
     def get(self, request, organization_id):
-        organization = get_object_or_404(
-            Organization,
-            id=organization_id,
-        )
-        return JsonResponse(
-            [user.email for user in organization.access_to_edit.all()],
-            safe=False,
-            status=status.HTTP_200_OK,
-        )
+        emails = User.objects.filter(
+            organizationuserrelation__organization_id=organization_id
+        ).values_list("email", flat=True)
+        return Response(list(emails))
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -92,19 +333,48 @@ class AccessToEditView(APIView):
     def post(self, request, organization_id):
         serializer = AccessToEditSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            organization = get_object_or_404(
-                Organization,
-                id=organization_id,
+            organization = get_request_organization(request, organization_id)
+            users, missing = self.resolve_users(
+                serializer.validated_data["user"]
+            )
+            with transaction.atomic():
+                added = self.grant_access(organization, list(users.values()))
+            return Response(
+                organization.as_json(
+                    added=self.emails(users, added), missing=missing
+                )
             )
-            users = get_list_or_404(User, email__in=request.data["user"])
-            for user in users:
-                organization.access_to_edit.add(user)
-                organization.save()
-            return JsonResponse(
-                organization.as_json(),
-                safe=False,
-                status=status.HTTP_200_OK,
+
+    @staticmethod
+    def grant_access(organization, user_ids):
+        """Открывает доступ и ставит в очередь письма новым редакторам.
+
+        Вызывается в транзакции: задача писем появляется только вместе
+        с выданным доступом. Возвращает id добавленных пользователей.
+        """
+        existing = set(
+            OrganizationUserRelation.objects.filter(
+                organization=organization, user_id__in=user_ids
+            ).values_list("user_id", flat=True)
+        )
+        added = [user_id for user_id in user_ids if user_id not in existing]
+        OrganizationUserRelation.objects.bulk_create(
+            [
+                OrganizationUserRelation(
+                    organization=organization, user_id=user_id
+                )
+                for user_id in added
+            ],
+            ignore_conflicts=True,
+        )
+        organization_editors_changed(organization.pk)
+        if added:
+            enqueue(
+                send_access_granted_email,
+                organization_id=organization.pk,
+                user_ids=added,
             )
+        return added
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -121,20 +391,100 @@ class AccessToEditView(APIView):
     def delete(self, request, organization_id):
         serializer = AccessToEditSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            organization = get_object_or_404(
-                Organization,
-                id=organization_id,
+            organization = get_request_organization(request, organization_id)
+            users, missing = self.resolve_users(
+                serializer.validated_data["user"]
             )
-            users = get_list_or_404(User, email__in=request.data["user"])
-            for user in users:
-                access_to_edit = get_object_or_404(
-                    OrganizationUserRelation,
-                    organization=organization,
-                    user=user,
+            relations = OrganizationUserRelation.objects.filter(
+                organization=organization, user_id__in=list(users.values())
+            )
+            with transaction.atomic(), batched_organization_changes():
+                removed = set(relations.values_list("user_id", flat=True))
+                relations.delete()
+            return Response(
+                organization.as_json(
+                    removed=self.emails(users, removed), missing=missing
                 )
-                access_to_edit.delete()
-            return JsonResponse(
-                organization.as_json(),
-                safe=False,
-                status=status.HTTP_200_OK,
             )
+
+    @staticmethod
+    def emails(users, user_ids):
+        """Email из ``users`` (email -> id) для ``user_ids``, в порядке
+        запроса."""
+        user_ids = set(user_ids)
+        return [email for email, pk in users.items() if pk in user_ids]
+
+    @staticmethod
+    def resolve_users(emails):
+        """Находит пользователей по списку email одним запросом.
+
+        Возвращает словарь email -> id найденных пользователей в порядке
+        запроса и список email, для которых пользователь не найден.
+        """
+        normalized = {
+            User.objects.normalize_email(email): email for email in emails
+        }
+        found = dict(
+            User.objects.filter(email__in=normalized).values_list(
+                "email", "id"
+            )
+        )
+        users = {email: found[email] for email in normalized if email in found}
+        missing = [
+            email
+            for normalized_email, email in normalized.items()
+            if normalized_email not in users
+        ]
+        return users, missing
+
+
+class UserProvisionView(APIView):
+    """Массовое создание пользователей сотрудником.
+
+    Пароли хэшируются в самом запросе, поэтому список ограничен
+    ``WEB_PROVISION_MAX_USERS``; большие списки создаёт команда
+    provision_users. Отчёт содержит число созданных, уже существующие и
+    повторяющиеся адреса, ошибки и скорость.
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = UserProvisionSerializer
+
+    @swagger_auto_schema(request_body=UserProvisionSerializer)
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = User.objects.bulk_create_users(
+            enumerate(serializer.validated_data["users"], start=1)
+        )
+        return Response(
+            result.as_dict(),
+            status=(
+                status.HTTP_201_CREATED
+                if result.created
+                else status.HTTP_200_OK
+            ),
+        )
+
+
+class TokenRevokeView(APIView):
+    """Отзывает все токены текущего пользователя."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        revoke_tokens(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProfilingView(APIView):
+    """Скользящая статистика профилирования запросов по маршрутам."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(aggregate.summary())
+
+    def delete(self, request):
+        aggregate.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)